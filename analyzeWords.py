@@ -1,53 +1,521 @@
+import io
+import itertools
+import json
+import os
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
-def analyzeWords(words):
+from wordMatcher import PatternMatcher
+
+LETTERS = [chr(i) for i in range(ord('a'), ord('z') + 1)]
+SIZE_CAPACITY = 64  # initial length of the size histogram, doubled when a longer word arrives
+
+
+class SpilledWords:
+    """
+    Words written to a text file (one per line) by WordMetrics, read back lazily each time they are iterated.
+    Words with a line break of their own, or starting with a double quote, are written as JSON strings, so every
+    word comes back whole.
+    """
+
+    def __init__(self, path, count):
+        self.path = path
+        self.count = count
+
+    def __iter__(self):
+        with open(self.path, encoding='utf-8', newline='\n') as f:
+            for line in f:
+                yield json.loads(line) if line.startswith('"') else line[:-1]
+
+    def __len__(self):
+        return self.count
+
+
+class WordMetrics:
+    """
+    Running analyzeWords metrics, updated one batch of words at a time.
+
+    The letter and size histograms are integer arrays (indexed by letter and by length) filled with np.bincount,
+    and are turned into the analyzeWords dicts only by result(). Sizes remember the position of the word they
+    first appeared at, so the size_counts dict keeps its first-appearance order after merges.
+
+    The histograms, maximum length and match counts take constant memory. The 'oo' and 6+
+    character words (and the words matching any extra patterns or length thresholds) are kept in memory by
+    default, appended to text files in spill_dir, or not kept at all.
+    """
+
+    def __init__(self, spill_dir=None, keep_words=True, patterns=None, thresholds=None):
+        """
+        Arguments:
+            spill_dir (str or None): Folder to write the matching words to instead of keeping them in memory.
+            keep_words (bool): Keep the matching words at all (the counts are always kept).
+            patterns (iterable or None): Extra substrings to count and list the words of, matched together with
+                                         'oo' by one PatternMatcher over the distinct words.
+            thresholds (iterable or None): Extra minimum lengths to count and list the words of.
+        """
+        self.letter_hist = np.zeros(len(LETTERS), dtype=np.int64)
+        self.size_hist = np.zeros(SIZE_CAPACITY, dtype=np.int64)
+        self.size_first = np.zeros(SIZE_CAPACITY, dtype=np.int64)
+        self.oo_count = 0
+        self.words_6plus_count = 0
+        self.word_count = 0
+
+        self.spill_dir = spill_dir
+        self.keep_words = keep_words
+        self._oo_words = []
+        self._words_6plus = []
+
+        self.patterns = tuple(patterns or ())
+        self.thresholds = tuple(thresholds or ())
+        # 'oo' is the matcher's first pattern; each extra pattern maps to its column of the matches
+        scanned = list(dict.fromkeys(("oo",) + self.patterns))
+        self._matcher = PatternMatcher(scanned)
+        self._columns = {pattern: scanned.index(pattern) for pattern in self.patterns}
+        self.pattern_counts = {pattern: 0 for pattern in self.patterns}
+        self.length_counts = {threshold: 0 for threshold in self.thresholds}
+        self._pattern_words = {pattern: [] for pattern in self.patterns}
+        self._length_words = {threshold: [] for threshold in self.thresholds}
+
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+            for name in self._spillNames():
+                open(os.path.join(spill_dir, name), 'w').close()
+
+    @property
+    def letter_counts(self):
+        """
+        dict: Number of words per first letter, 'a' to 'z'.
+        """
+        return dict(zip(LETTERS, self.letter_hist.tolist()))
+
+    @property
+    def size_counts(self):
+        """
+        dict: Number of words per length, in the order each length first appeared.
+        """
+        sizes = np.flatnonzero(self.size_hist)
+        sizes = sizes[np.argsort(self.size_first[sizes], kind='stable')]
+        return dict(zip(sizes.tolist(), self.size_hist[sizes].tolist()))
+
+    @property
+    def max_char(self):
+        """
+        int: Length of the longest word (0 before any word is added).
+        """
+        sizes = np.flatnonzero(self.size_hist)
+        return int(sizes[-1]) if len(sizes) else 0
+
+    @staticmethod
+    def _distinct(words):
+        """
+        Encodes a batch of words once for all the metrics.
+
+        Returns:
+            tuple: The code of each word (its distinct words in first-appearance order), the number of times each
+                   distinct word occurs, and the distinct words as strings, lower-cased.
+        """
+        values = words.tolist()
+        try:
+            has_nul = '\x00' in ''.join(values)
+        except TypeError:
+            has_nul = any(isinstance(word, str) and '\x00' in word for word in values)
+
+        if has_nul:
+            # pd.factorize compares strings only up to a NUL character, so 'a' and 'a\x00b' would share a code
+            index = {}
+            codes = np.fromiter((index.setdefault(word, len(index)) for word in values), dtype=np.int64,
+                                count=len(values))
+            uniques = list(index)
+        else:
+            codes, uniques = pd.factorize(words, use_na_sentinel=False)
+        frequency = np.bincount(codes, minlength=len(uniques))
+        lowered = pd.Series(uniques, dtype=object).astype(str).str.lower().to_numpy()
+        return codes, uniques, frequency, lowered
+
+    def _countHistograms(self, codes, frequency, lowered, offset):
+        """
+        Adds a non-empty batch of words (encoded by _distinct), starting at word number `offset`, to the letter
+        and size histograms.
+        """
+        # Every distinct word is normalized once: the lengths and first letters derive from its lower case
+        lengths = np.fromiter(map(len, lowered), dtype=np.int64, count=len(lowered))
+        first_letters = pd.Categorical([word[:1] for word in lowered], categories=LETTERS).codes
+
+        # Count words by first letter (code -1 is anything but a-z)
+        valid = first_letters >= 0
+        self.letter_hist += np.bincount(first_letters[valid], weights=frequency[valid],
+                                        minlength=len(LETTERS)).astype(np.int64)
+
+        # Count words by size, with the position each size first appears at: a new code appears exactly where
+        # the running maximum of the codes increases
+        running = np.maximum.accumulate(codes)
+        word_first = np.flatnonzero(np.r_[True, running[1:] > running[:-1]])
+        size_first = np.zeros(lengths.max() + 1, dtype=np.int64)
+        sizes, first = np.unique(lengths, return_index=True)
+        size_first[sizes] = word_first[first]
+        self._addSizes(np.bincount(lengths, weights=frequency).astype(np.int64), size_first, offset)
+
+    def _addSizes(self, size_hist, size_first, offset):
+        """
+        Adds a size histogram whose first-appearance positions are relative to word number `offset`.
+        """
+        if len(size_hist) > len(self.size_hist):
+            capacity = max(len(size_hist), 2 * len(self.size_hist))
+            self.size_hist = np.pad(self.size_hist, (0, capacity - len(self.size_hist)))
+            self.size_first = np.pad(self.size_first, (0, capacity - len(self.size_first)))
+
+        hist, first = self.size_hist[:len(size_hist)], self.size_first[:len(size_hist)]
+        np.copyto(first, size_first + offset, where=(hist == 0) & (size_hist > 0))
+        hist += size_hist
+
+    def _spillNames(self):
+        """
+        Returns:
+            list: The spill file names: the 'oo' and 6+ words, then one per pattern and one per threshold.
+        """
+        return (["oo_words.txt", "words_6plus.txt"] + [f"pattern_{j}.txt" for j in range(len(self.patterns))]
+                + [f"length_{threshold}.txt" for threshold in self.thresholds])
+
+    def _pieces(self):
+        """
+        Returns:
+            list: The in-memory word lists, in the order of _spillNames.
+        """
+        return ([self._oo_words, self._words_6plus] + list(self._pattern_words.values())
+                + list(self._length_words.values()))
+
+    def update(self, words):
+        """
+        Adds a batch of words to the metrics.
+
+        Arguments:
+            words (pd.Series): Series of words to analyze.
+        """
+        offset = self.word_count
+        self.word_count += len(words)
+        if len(words) == 0:
+            return
+        codes, uniques, frequency, lowered = self._distinct(words)
+        self._countHistograms(codes, frequency, lowered, offset)
+
+        # Every question is answered per distinct word and mapped to the words through their codes: one matcher
+        # scan for 'oo' and the extra patterns, and one length per distinct word for every threshold
+        matches = self._matcher.matchUniques(uniques)
+        word_lengths = np.fromiter((len(word) if isinstance(word, str) else -1 for word in uniques), dtype=np.int64,
+                                   count=len(uniques))
+
+        def lowerCase(mask):
+            # the lower-cased words of the batch where mask (per distinct word) is True
+            selected = mask[codes]
+            return pd.Series(lowered[codes[selected]], index=words.index[selected], name=words.name, dtype=object)
+
+        # Extract words that contain 'oo' and those that contain 6 or more letters
+        oo_words = words[matches[:, 0][codes]]
+        words_6plus = lowerCase(word_lengths >= 6)
+        self.oo_count += len(oo_words)
+        self.words_6plus_count += len(words_6plus)
+        found = [oo_words, words_6plus]
+
+        # Extra patterns: counts come from the word frequencies
+        for pattern in self.patterns:
+            column = matches[:, self._columns[pattern]]
+            self.pattern_counts[pattern] += int(frequency @ column)
+            if self.keep_words or self.spill_dir is not None:
+                found.append(words[column[codes]])
+
+        # Extra length thresholds, lower-cased like the 6+ character words
+        for threshold in self.thresholds:
+            long_words = lowerCase(word_lengths >= threshold)
+            self.length_counts[threshold] += len(long_words)
+            found.append(long_words)
+
+        if self.spill_dir is not None:
+            for name, matched in zip(self._spillNames(), found):
+                self._spill(name, matched)
+        elif self.keep_words:
+            for pieces, matched in zip(self._pieces(), found):
+                pieces.append(matched)
+
+    def merge(self, other):
+        """
+        Adds the metrics of another batch of words, analyzed after this one, into this object.
+
+        Every metric is a sum, a maximum or a concatenation, so merging the metrics of consecutive shards in
+        order gives exactly the metrics of the whole input.
+
+        Arguments:
+            other (WordMetrics): Metrics of the words that follow the ones in this object.
+
+        Returns:
+            WordMetrics: This object, for chaining.
+        """
+        self.letter_hist += other.letter_hist
+        self._addSizes(other.size_hist, other.size_first, self.word_count)
+        self.oo_count += other.oo_count
+        self.words_6plus_count += other.words_6plus_count
+        self.word_count += other.word_count
+        for pattern, count in other.pattern_counts.items():
+            self.pattern_counts[pattern] += count
+        for threshold, count in other.length_counts.items():
+            self.length_counts[threshold] += count
+
+        if self.spill_dir is not None:
+            for name in self._spillNames():
+                with open(os.path.join(self.spill_dir, name), 'ab') as f, \
+                        open(os.path.join(other.spill_dir, name), 'rb') as words:
+                    shutil.copyfileobj(words, f)
+        elif self.keep_words:
+            for pieces, other_pieces in zip(self._pieces(), other._pieces()):
+                pieces.extend(other_pieces)
+        return self
+
+    def _shift(self, offset):
+        """
+        Moves the index of the kept words by offset, for shards that were numbered from 0.
+        """
+        for pieces in self._pieces():
+            pieces[:] = [words.set_axis(words.index + offset) for words in pieces]
+
+    def _spill(self, name, words):
+        words = [str(word) for word in words]
+        text = "\n".join(words)
+        if text.count("\n") != len(words) - 1 or "\r" in text or text.startswith('"') or '\n"' in text:
+            # some words would not read back as one line: write those as JSON strings
+            text = "\n".join(json.dumps(word, ensure_ascii=False) if "\n" in word or "\r" in word
+                             or word.startswith('"') else word for word in words)
+        with open(os.path.join(self.spill_dir, name), 'a', encoding='utf-8', newline='\n') as f:
+            f.write(text + "\n" if words else "")
+
+    def _words(self, name, pieces, count):
+        """
+        Returns the matching words: a Series (or [] if no words were analyzed), a SpilledWords iterator, or None.
+        """
+        if self.spill_dir is not None:
+            return SpilledWords(os.path.join(self.spill_dir, name), count)
+        if not self.keep_words:
+            return None
+        return pd.concat(pieces) if pieces and self.word_count else []
+
+    def result(self):
+        """
+        Returns:
+            dict: The analyzeWords metrics for every word added so far.
+        """
+        oo_words = self._words("oo_words.txt", self._oo_words, self.oo_count)
+        words_6plus = self._words("words_6plus.txt", self._words_6plus, self.words_6plus_count)
+
+        result = {
+            "letter_counts": self.letter_counts,
+            "max_char": self.max_char,
+            "size_counts": self.size_counts,
+            "oo_count": self.oo_count,
+            "oo_words": oo_words,
+            "words_6plus": words_6plus,
+            "words_6plus_count": self.words_6plus_count
+        }
+        if self.patterns:
+            result["pattern_counts"] = dict(self.pattern_counts)
+            result["pattern_words"] = {
+                pattern: self._words(f"pattern_{j}.txt", self._pattern_words[pattern], self.pattern_counts[pattern])
+                for j, pattern in enumerate(self.patterns)}
+        if self.thresholds:
+            result["length_counts"] = dict(self.length_counts)
+            result["length_words"] = {
+                threshold: self._words(f"length_{threshold}.txt", self._length_words[threshold],
+                                       self.length_counts[threshold])
+                for threshold in self.thresholds}
+        return result
+
+
+def analyzeWords(words, patterns=None, thresholds=None):
     """
     Analyze a Pandas.Series of words to generate various metrics.
 
     Arguments:
         words (pd.Series): Series of words to analyze.
+        patterns (iterable or None): Extra substrings (case-sensitive, like "oo"). When given, the result also has
+                                     'pattern_counts' and 'pattern_words', keyed by pattern.
+        thresholds (iterable or None): Extra minimum word lengths. When given, the result also has
+                                       'length_counts' and 'length_words' (lower-cased, like 'words_6plus'),
+                                       keyed by threshold.
 
     Returns:
         dict: Dictionary containing various metrics.
     """
-    # Initialize metrics
-    letter_counts = {chr(i): 0 for i in range(ord('a'), ord('z') + 1)}
-    max_char = 0
-    size_counts = {}
-    oo_words = []
-    words_6plus = []
+    metrics = WordMetrics(patterns=patterns, thresholds=thresholds)
+    metrics.update(words)
 
+    return metrics.result()
 
-    for word in words:
-        word = str(word).lower()  # Ensure consistent casing
-        first_letter = word[0] if word else ""
-        word_len = len(word)
 
-        # Count words by first letter
-        if first_letter.isalpha():
-            letter_counts[first_letter] += 1
+def _asText(words):
+    """
+    Returns a batch of words with object dtype, as analyzeWords sees a whole column. A chunk of a CSV reader
+    holding only numeric-looking (or True/False) words is parsed as numbers; they are written back as strings in
+    their shortest form ("7", "8.5"), with missing values left missing. Text like "007" cannot be recovered from
+    the number: pass dtype={column: object} to the reader to keep it.
+    """
+    if words.dtype == object:
+        return words
+    if words.dtype.kind == 'f':
+        # whole numbers are parsed as floats when the chunk also holds a fraction or a missing value
+        return words.map(lambda value: str(int(value)) if value.is_integer() else repr(value), na_action='ignore')
+    return words.astype(str)
+
 
-        # Track the longest word length
-        max_char = max(max_char, word_len)
+def _batches(source, chunksize, column):
+    """
+    Turns a streaming source into a sequence of pd.Series batches of at most chunksize words.
+    """
+    if isinstance(source, str):
+        source = pd.read_csv(source, usecols=[column], dtype={column: object}, chunksize=chunksize)
 
-        # Count words by size
-        size_counts[word_len] = size_counts.get(word_len, 0) + 1
+    start = 0
+    iterator = iter(source)
+    for first in iterator:
+        if isinstance(first, (pd.DataFrame, pd.Series)):
+            # a chunked CSV reader or any iterable of frames/Series
+            for batch in itertools.chain([first], iterator):
+                yield _asText(batch[column] if isinstance(batch, pd.DataFrame) else batch)
+            return
+
+        # an iterable of single words, grouped into batches with a running index
+        iterator = itertools.chain([first], iterator)
+        while True:
+            words = list(itertools.islice(iterator, chunksize))
+            if not words:
+                return
+            yield pd.Series(words, index=pd.RangeIndex(start, start + len(words)), name=column, dtype=object)
+            start += len(words)
+
+
+def analyzeWordsStream(source, chunksize=100000, column='x', spill_dir=None, keep_words=True, patterns=None,
+                       thresholds=None, metrics=False):
+    """
+    Analyze words from a source that may not fit in memory, one batch at a time.
+
+    Arguments:
+        source (str or iterable): Path to a CSV file of words, a chunked CSV reader (pd.read_csv(...,
+                                  chunksize=n)), an iterable of DataFrames or Series, or an iterable of words.
+        chunksize (int): Words per batch when reading a file or grouping single words.
+        column (str): Column of the CSV file (or DataFrames) holding the words.
+        spill_dir (str or None): Folder to write the 'oo' and 6+ character words to. They are then returned as
+                                 SpilledWords iterators that read the files lazily.
+        keep_words (bool): If False (and spill_dir is None), only count the matching words and return None
+                           in place of the word lists.
+        patterns (iterable or None): Extra substrings to count and list (see analyzeWords).
+        thresholds (iterable or None): Extra minimum word lengths to count and list (see analyzeWords).
+        metrics (bool): Return the WordMetrics object itself (for merging) instead of its result.
+
+    Returns:
+        dict: The same metrics as analyzeWords.
+    """
+    word_metrics = WordMetrics(spill_dir, keep_words, patterns, thresholds)
+    for batch in _batches(source, chunksize, column):
+        word_metrics.update(batch)
+
+    return word_metrics if metrics else word_metrics.result()
+
+
+def _analyzeRange(filename, start, end, columns, column, chunksize, spill_dir, keep_words, patterns, thresholds):
+    """
+    Worker task: analyzes the lines of a CSV file between two byte offsets. The words are indexed from 0.
+    """
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    reader = pd.read_csv(io.BytesIO(data), header=None, names=columns, usecols=[column], dtype={column: object},
+                         chunksize=chunksize)
+    return analyzeWordsStream(reader, chunksize, column, spill_dir, keep_words, patterns, thresholds, metrics=True)
+
+
+def _lineRanges(filename, shards):
+    """
+    Splits a CSV file after its header into about `shards` byte ranges that start and end on line boundaries.
+    """
+    with open(filename, 'rb') as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        bounds = [len(header)]
+        for i in range(1, shards):
+            f.seek(max(bounds[-1], len(header) + (size - len(header)) * i // shards))
+            f.readline()
+            if f.tell() < size:
+                bounds.append(f.tell())
+        bounds.append(size)
+
+    columns = list(pd.read_csv(io.BytesIO(header)).columns)
+    return columns, [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
 
-        # Extract words that contain 'oo' and those that contain 6 or more letters
-        oo_words = words[words.str.contains("oo")]
-        words_6plus = words[words.str.len() >= 6].str.lower()
 
-    metrics = {
-        "letter_counts": letter_counts,
-        "max_char": max_char,
-        "size_counts": size_counts,
-        "oo_count": len(oo_words),
-        "oo_words": oo_words,
-        "words_6plus": words_6plus,
-        "words_6plus_count": len(words_6plus)
-    }
+def analyzeWordsParallel(source, workers=None, chunksize=100000, column='x', spill_dir=None, keep_words=True,
+                         patterns=None, thresholds=None):
+    """
+    Analyze words across a pool of worker processes and merge their WordMetrics.
+
+    A CSV path is split into byte ranges that each worker reads on its own; any other source is sent to the
+    workers one batch at a time, with only a few batches in flight. The result is the same as
+    analyzeWordsStream (and analyzeWords) on the same input.
 
-    return metrics
+    Arguments:
+        source (str or iterable): Any source accepted by analyzeWordsStream.
+        workers (int or None): Number of worker processes. Defaults to os.cpu_count(); 1 runs in this process.
+        chunksize (int): Words per batch.
+        column (str): Column of the CSV file (or DataFrames) holding the words.
+        spill_dir (str or None): Folder to write the 'oo' and 6+ character words to (see analyzeWordsStream).
+        keep_words (bool): If False (and spill_dir is None), only count the matching words.
+        patterns (iterable or None): Extra substrings to count and list (see analyzeWords).
+        thresholds (iterable or None): Extra minimum word lengths to count and list (see analyzeWords).
+
+    Returns:
+        dict: The same metrics as analyzeWords.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return analyzeWordsStream(source, chunksize, column, spill_dir, keep_words, patterns, thresholds)
+
+    metrics = WordMetrics(spill_dir, keep_words, patterns, thresholds)
+    shard_dir = lambda i: None if spill_dir is None else os.path.join(spill_dir, f"shard_{i}")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if isinstance(source, str):
+            columns, ranges = _lineRanges(source, workers * 4)
+            futures = [pool.submit(_analyzeRange, source, start, end, columns, column, chunksize, shard_dir(i),
+                                   keep_words, patterns, thresholds) for i, (start, end) in enumerate(ranges)]
+        else:
+            futures = _boundedMap(pool, lambda i, batch: pool.submit(
+                analyzeWordsStream, [batch], chunksize, column, shard_dir(i), keep_words, patterns, thresholds,
+                metrics=True),
+                _batches(source, chunksize, column), workers * 2)
+
+        # merge the shards in input order so that the word lists and size order match a serial run
+        for future in futures:
+            part = future.result()
+            if isinstance(source, str):
+                part._shift(metrics.word_count)
+            metrics.merge(part)
+            if part.spill_dir is not None:
+                shutil.rmtree(part.spill_dir)
+
+    return metrics.result()
+
+
+def _boundedMap(pool, submit, items, window):
+    """
+    Submits one task per item, keeping at most `window` tasks in flight, and yields the futures in order.
+    """
+    pending = deque()
+    for i, item in enumerate(items):
+        pending.append(submit(i, item))
+        if len(pending) >= window:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
 
 
 if __name__ == "__main__":
@@ -65,4 +533,4 @@ if __name__ == "__main__":
     print(metrics['oo_words'])  # Display first few words with 'oo'
     print("\nWords with 6 or more characters:")
     print(metrics['words_6plus'])  # Display first few long words
-    print("\nNumber of words with 6 or more characters:", metrics['words_6plus_count'])
\ No newline at end of file
+    print("\nNumber of words with 6 or more characters:", metrics['words_6plus_count'])
@@ -1,123 +1,709 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+from collections.abc import Mapping
+from functools import cache
+
+import numpy as np
 import pandas as pd
 
-def bbanalyze(filename="baseball.csv"):
+# Counting statistics summed per player for the career records
+STAT_COLUMNS = ['hr', 'ab', 'h', 'sb', 'so', 'bb', 'g', 'ibb', 'hbp', 'sf', 'sh']
+
+# Names of the records, in the order they appear in the results dictionary
+RECORD_NAMES = ['obp', 'pab', 'hr', 'hrp', 'h', 'hp', 'sb', 'sbp', 'so', 'sop', 'sopa', 'bb', 'bbp', 'g']
+
+# Players need more than this many career at-bats to be eligible for a record
+MIN_AB = 50
+
+# Compact dtypes for the baseball columns: categorical text and the narrowest nullable integers that hold
+# a single season's values (the largest is 'rowid', then 'ab' and 'year')
+BASEBALL_SCHEMA = {
+    'rowid': 'Int32',
+    'id': 'category',
+    'year': 'Int16',
+    'stint': 'Int8',
+    'team': 'category',
+    'lg': 'category',
+    'g': 'Int16',
+    'ab': 'Int16',
+    'r': 'Int16',
+    'h': 'Int16',
+    'X2b': 'Int8',
+    'X3b': 'Int8',
+    'hr': 'Int8',
+    'rbi': 'Int16',
+    'sb': 'Int16',
+    'cs': 'Int8',
+    'bb': 'Int16',
+    'so': 'Int16',
+    'ibb': 'Int16',
+    'hbp': 'Int8',
+    'sh': 'Int8',
+    'sf': 'Int8',
+    'gidp': 'Int8',
+}
+
+
+def recordStats(totals):
     """
-        Analyze baseball player statistics from a CSV file.
+        Calculates every record statistic from per-player career totals.
+
+        Args:
+            totals (pd.DataFrame or dict): Career totals for the columns in STAT_COLUMNS.
+
+        Returns:
+            dict: Maps each record name to an array with one value per player.
+        """
+
+    hr, ab, h, sb, so, bb, g, ibb, hbp, sf, sh = (np.asarray(totals[col]) for col in STAT_COLUMNS)
+
+    return {
+        "obp": (h + bb + hbp) / (ab + bb + hbp),
+        "pab": (h + bb + hbp + sf + sh) / (ab + bb + hbp + sf + sh),
+        "hr": hr,
+        "hrp": hr / ab,
+        "h": h,
+        "hp": h / ab,
+        "sb": sb,
+        "sbp": sb / ab,
+        "so": so,
+        "sop": so / ab,
+        "sopa": so / (ab + bb + hbp + sf + sh),
+        "bb": bb,
+        "bbp": bb / ab,
+        "g": g,
+    }
+
+
+def careerTotals(bb2):
+    """
+        Sums the STAT_COLUMNS for each player in one grouped aggregation.
+
+        Args:
+            bb2 (pd.DataFrame): Complete cases of the player data.
+
+        Returns:
+            pd.DataFrame: Career totals indexed by player id.
+        """
+
+    # Integer columns (including the nullable ones of BASEBALL_SCHEMA) are summed as int64 so that
+    # career totals cannot overflow
+    stats = {}
+    for col in STAT_COLUMNS:
+        values = bb2[col]
+        stats[col] = values.to_numpy(dtype=np.int64) if pd.api.types.is_integer_dtype(values.dtype) \
+            else values.to_numpy()
+    stats = pd.DataFrame(stats, index=bb2.index)
+
+    return stats.groupby(bb2['id'], observed=True).sum()
+
+
+def computeRecords(totals, min_ab=MIN_AB, ids=None):
+    """
+        Finds the career record holder for every statistic in a single pass.
+
+        Args:
+            totals (pd.DataFrame or dict): Career totals for the columns in STAT_COLUMNS, indexed by player id.
+                                           A dict of arrays can be passed together with ids.
+            min_ab (int): Players need more than this many at-bats to be eligible.
+            ids (np.ndarray or None): Player ids for a dict of totals, in the same order. Defaults to the
+                                      DataFrame's index.
+
+        Returns:
+            dict: Maps each record name to a dictionary with the player 'id' and the record 'value' (both None
+                  when no player is eligible).
+        """
+
+    if ids is None:
+        ids = totals.index.to_numpy()
+    columns = {col: np.asarray(totals[col]) for col in STAT_COLUMNS}
+
+    eligible = columns['ab'] > min_ab
+    if not eligible.any():
+        return {name: {"id": None, "value": None} for name in RECORD_NAMES}
+
+    ids = ids[eligible]
+    stats = recordStats({col: values[eligible] for col, values in columns.items()})
+
+    # One argmax over the stats matrix finds every record holder (first player in id order on ties)
+    matrix = np.column_stack([stats[name].astype(float) for name in RECORD_NAMES])
+    leaders = np.nanargmax(matrix, axis=0)
+
+    return {name: {"id": ids[row], "value": stats[name][row]} for name, row in zip(RECORD_NAMES, leaders)}
+
+
+def _fileHash(filename, block_size=1 << 20):
+    """
+        Calculates the SHA-256 digest of a file's contents.
+        """
+
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _writeSnapshot(bb, folder):
+    """
+        Writes each column of a DataFrame to its own .npy file. Text columns are stored as integer codes
+        plus a fixed-width unicode array of categories, so every file can be memory-mapped.
+
+        Returns:
+            list: Column descriptions for the cache metadata.
+        """
+
+    os.makedirs(folder)
+    columns = []
+    for i, col in enumerate(bb.columns):
+        series = bb[col]
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            np.save(os.path.join(folder, f"{i}.npy"), series.to_numpy())
+            columns.append({"name": col, "dtype": str(series.dtype), "kind": "numeric"})
+        else:
+            codes, categories = pd.factorize(series, sort=True)
+            np.save(os.path.join(folder, f"{i}.npy"), codes.astype(np.int32))
+            np.save(os.path.join(folder, f"{i}.categories.npy"), np.asarray(categories, dtype=str))
+            columns.append({"name": col, "dtype": str(series.dtype), "kind": "text"})
+    return columns
+
+
+def _readSnapshot(folder, columns, categorical=()):
+    """
+        Rebuilds a DataFrame from the .npy files written by _writeSnapshot.
+
+        Numeric columns are copy-on-write memory maps of their files, so pages are only read when used and
+        writing to the frame never changes the snapshot. Text columns named in categorical become categoricals
+        over the stored codes; the others are decoded into object arrays, as read_csv returns them.
+        """
+
+    data = {}
+    for i, col in enumerate(columns):
+        values = np.load(os.path.join(folder, f"{i}.npy"), mmap_mode='c')
+        if col["kind"] == "text":
+            categories = np.load(os.path.join(folder, f"{i}.categories.npy")).astype(object)
+            if col["name"] in categorical:
+                values = pd.Categorical.from_codes(values, categories=categories)
+            else:
+                text = categories[values] if len(categories) else np.empty(len(values), dtype=object)
+                text[values < 0] = np.nan
+                values = text if col["dtype"] == "object" else pd.array(text, dtype=col["dtype"])
+        data[col["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def _lineEnd(f, start, size, block_size=1 << 16):
+    """
+        Returns the position just after the last line break of a binary file between start and size, or start if
+        there is none, reading the file backwards one block at a time.
+        """
+
+    end = size
+    while end > start:
+        block = min(block_size, end - start)
+        f.seek(end - block)
+        found = f.read(block).rfind(b'\n')
+        if found >= 0:
+            return end - block + found + 1
+        end -= block
+    return start
+
+
+class _FileSlice(io.RawIOBase):
+    """
+        Read-only view of the next `size` bytes of a binary file, so read_csv can stream part of a file.
+        """
+
+    def __init__(self, f, size):
+        self.f = f
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.f.readinto(memoryview(buffer)[:self.remaining])
+        self.remaining -= count
+        return count
+
+
+def _writeMeta(meta_file, meta):
+    """
+        Replaces the cache metadata atomically, so readers never see a partially written file.
+        """
+
+    tmp_file = meta_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_file, meta_file)
+
+
+def loadBaseball(filename="baseball.csv", cache_dir=None, compact=False):
+    """
+        Reads a baseball CSV file, optionally through a columnar on-disk cache.
+
+        The cache keeps one snapshot per source file in cache_dir, keyed on the file's absolute path and
+        validated against its size, modification time and content hash. When the size or modification time
+        changes the file is hashed again, and the snapshot is only rebuilt if the contents really changed.
 
         Args:
             filename (str): Path to the CSV file containing player data.
+            cache_dir (str or None): Folder for cached snapshots. Defaults to None (no caching).
+            compact (bool): Load the columns with the dtypes in BASEBALL_SCHEMA. Defaults to False.
 
         Returns:
-            dict: Summary of baseball statistics, including player and league metrics.
+            pd.DataFrame: The player data, identical to pd.read_csv(filename) unless compact is True.
+        """
+
+    if cache_dir is None:
+        return pd.read_csv(filename, dtype=_schema(filename) if compact else None)
+
+    if not compact:
+        return _cachedRead(filename, cache_dir)
+
+    bb = _cachedRead(filename, cache_dir, [col for col, dtype in BASEBALL_SCHEMA.items() if dtype == 'category'])
+    return bb.astype(_schema(bb.columns))
+
+
+def _schema(columns):
+    """
+        Returns the part of BASEBALL_SCHEMA that applies to the given columns (or to a CSV file's header).
         """
 
-    # Read the CSV file into a DataFrame
-    bb = pd.read_csv(filename)
+    if isinstance(columns, str):
+        columns = pd.read_csv(columns, nrows=0).columns
+    return {col: BASEBALL_SCHEMA[col] for col in columns if col in BASEBALL_SCHEMA}
 
-    # Creates a new dataset without missing values
-    bb2 = bb.dropna()
 
-    #Sums each baseball record for later calculations
-    sum_values = bb2[['id', 'hr', 'ab', 'h', 'sb', 'so', 'bb', 'g', 'ibb', 'hbp', 'sf', 'sh']].groupby('id').sum()
+def _cachedRead(filename, cache_dir, categorical=()):
+    """
+        Reads a CSV file through the snapshot cache described in loadBaseball, with the text columns named in
+        categorical loaded as categoricals (see _readSnapshot).
+        """
 
-    #Creates a new data set that filters out players with fewer than 50 at-bats
-    bb_new = sum_values[(sum_values['ab'] > 50)]
+    path = os.path.abspath(filename)
+    entry = os.path.join(cache_dir, hashlib.sha1(path.encode()).hexdigest()[:16])
+    meta_file = os.path.join(entry, "meta.json")
+    stat = os.stat(path)
 
-    #For each of the baseball records, calculates the value/percentage and finds the maximum value among all the players
-    sum_obp = (bb_new['h'] + bb_new['bb'] + bb_new['hbp']) / (bb_new['ab'] + bb_new['bb'] + bb_new['hbp'])
-    max_obp = sum_obp.max()
+    meta = None
+    if os.path.exists(meta_file):
+        with open(meta_file) as f:
+            meta = json.load(f)
 
-    sum_pab = (bb_new['h'] + bb_new['bb'] + bb_new['hbp'] + bb_new['sf'] + bb_new['sh']) / (
-            bb_new['ab'] + bb_new['bb'] + bb_new['hbp'] + bb_new['sf'] + bb_new['sh'])
-    max_pab = sum_pab.max()
+    if meta is not None and meta["path"] == path:
+        if meta["size"] == stat.st_size and meta["mtime"] == stat.st_mtime_ns:
+            return _readSnapshot(os.path.join(entry, meta["hash"]), meta["columns"], categorical)
 
-    sum_hrp = bb_new['hr']/bb_new['ab']
-    max_hrp = sum_hrp.max()
+        content_hash = _fileHash(path)
+        if meta["hash"] == content_hash:
+            # touched but unchanged: refresh the metadata and keep the snapshot
+            meta.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+            _writeMeta(meta_file, meta)
+            return _readSnapshot(os.path.join(entry, meta["hash"]), meta["columns"], categorical)
+    else:
+        content_hash = _fileHash(path)
 
-    sum_hp = bb_new['h'] / bb_new['ab']
-    max_hp = sum_hp.max()
+    # missing or stale snapshot: parse the CSV and write a new snapshot next to the old one
+    bb = pd.read_csv(path)
+    folder = os.path.join(entry, content_hash)
+    shutil.rmtree(folder, ignore_errors=True)
+    columns = _writeSnapshot(bb, folder)
+    _writeMeta(meta_file, {"path": path, "size": stat.st_size, "mtime": stat.st_mtime_ns,
+                           "hash": content_hash, "columns": columns})
 
-    sum_sbp = bb_new['sb'] / bb_new['ab']
-    max_sbp = sum_sbp.max()
+    # remove snapshots of earlier versions of the file
+    for name in os.listdir(entry):
+        if name not in (content_hash, "meta.json") and os.path.isdir(os.path.join(entry, name)):
+            shutil.rmtree(os.path.join(entry, name), ignore_errors=True)
 
-    sum_sop = bb_new['so'] / bb_new['ab']
-    max_sop = sum_sop.max()
+    return bb
 
-    sum_sopa = bb_new['so'] / (bb_new['ab'] + bb_new['bb'] + bb_new['hbp'] + bb_new['sf'] + bb_new['sh'])
-    max_sopa = sum_sopa.max()
 
-    sum_bbp = bb_new['bb'] / bb_new['ab']
-    max_bbp = sum_bbp.max()
+class BattingAggregate:
+    """
+        Running totals for bbanalyze that can be built one chunk of rows at a time.
 
-    # Adds 'obp' and 'pab' columns to the created dataframe
-    bb2['obp'] = (bb2['h'] + bb2['bb'] + bb2['hbp']) / (bb2['ab'] + bb2['bb'] + bb2['hbp'])
-    bb2['pab'] = (bb2['h'] + bb2['bb'] + bb2['hbp'] + bb2['sf'] + bb2['sh']) / (
-            bb2['ab'] + bb2['bb'] + bb2['hbp'] + bb2['sf'] + bb2['sh'])
+        Holds per-player sums of STAT_COLUMNS over the complete cases, the row and complete-case counts,
+        the year range and the sets of distinct players, teams and leagues. Memory grows with the number of
+        players and teams, not with the number of rows.
+        """
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=object)  # player ids, sorted
+        self.totals = np.zeros((0, len(STAT_COLUMNS)))  # one row of STAT_COLUMNS sums per player
+        self.float_columns = set()  # stat columns read as floats, so records keep read_csv's dtypes
+        self.record_count = 0
+        self.complete_cases = 0
+        self.year_min = None
+        self.year_max = None
+        self.players = set()
+        self.teams = set()
+        self.leagues = set()
+        self.league_players = {'NL': set(), 'AL': set()}
+        self.league_teams = {'NL': set(), 'AL': set()}
+        self.source_offset = 0  # bytes of the source file already folded in by fromFile or updateFromFile
+        self.source_columns = None
 
-    #Compiles records into a dictionary
-    results = {
-        "record.count": len(bb),
-        "complete.cases": len(bb2),
-        "years": (bb['year'].min(), bb['year'].max()),
-        "player.count": bb['id'].nunique(),
-        "team.count": bb['team'].nunique(),
-        "league.count": bb['lg'].nunique(),
-        "bb": bb2,  # Entire dataframe with obp and pab columns added
-        "nl": {
-            "dat": bb2[bb2['lg'] == 'NL'],
-            "players": bb2[bb2['lg'] == 'NL']['id'].nunique(),
-            "teams": bb2[bb2['lg'] == 'NL']['team'].nunique()
-        },
-        "al": {
-            "dat": bb2[bb2['lg'] == 'AL'],
-            "players": bb2[bb2['lg'] == 'AL']['id'].nunique(),
-            "teams": bb2[bb2['lg'] == 'AL']['team'].nunique()
-        },
-        "records": {
-            # Records the statistics for all record values
+    @classmethod
+    def fromFile(cls, filename, chunksize=100000, compact=False):
+        """
+            Builds the aggregate from a CSV file, reading at most chunksize rows at a time.
 
-            "obp": {"id": sum_obp.groupby('id').sum().idxmax(),
-                    "value": max_obp},
+            Args:
+                filename (str): Path to the CSV file containing player data.
+                chunksize (int or None): Number of rows per chunk, or None to read the whole file at once.
+                compact (bool): Read the chunks with BASEBALL_SCHEMA.
 
-            "pab": {"id": sum_pab.groupby('id').sum().idxmax(),
-                    "value": max_pab},
+            Returns:
+                BattingAggregate: Totals for the whole file. It remembers the header and how many bytes it read,
+                                  so updateFromFile on the same file later folds in only the appended rows.
+            """
 
-            "hr": {"id": bb_new['hr'].groupby('id').sum().idxmax(),
-                    "value": bb_new['hr'].groupby('id').sum().max()},
+        aggregate = cls()
+        aggregate._readSource(filename, chunksize, compact, partial=True)
+        return aggregate
+
+    @classmethod
+    def load(cls, filename):
+        """
+            Reads an aggregate written by save.
 
-            "hrp": {"id": sum_hrp.groupby('id').sum().idxmax(),
-                    "value": max_hrp},
+            Args:
+                filename (str): Path of the .npz file.
 
-            "h": {"id": bb_new['h'].groupby('id').sum().idxmax(),
-                  "value": bb_new['h'].groupby('id').sum().max(),},
+            Returns:
+                BattingAggregate: The saved totals.
+            """
+
+        aggregate = cls()
+        with np.load(filename) as saved:
+            meta = json.loads(str(saved['meta']))
+            aggregate.ids = saved['ids'].astype(object)
+            aggregate.totals = saved['totals']
+            if len(saved['years']):
+                aggregate.year_min, aggregate.year_max = saved['years']
+
+        aggregate.float_columns = set(meta['float_columns'])
+        aggregate.record_count = meta['record_count']
+        aggregate.complete_cases = meta['complete_cases']
+        aggregate.players = set(meta['players'])
+        aggregate.teams = set(meta['teams'])
+        aggregate.leagues = set(meta['leagues'])
+        aggregate.league_players = {k: set(v) for k, v in meta['league_players'].items()}
+        aggregate.league_teams = {k: set(v) for k, v in meta['league_teams'].items()}
+        aggregate.source_offset = meta['source_offset']
+        aggregate.source_columns = meta['source_columns']
+        return aggregate
+
+    def save(self, filename):
+        """
+            Writes the aggregate to a .npz file, so that it can be updated later with only new rows.
+
+            Args:
+                filename (str): Path of the .npz file.
+            """
+
+        meta = {
+            "float_columns": sorted(self.float_columns),
+            "record_count": self.record_count,
+            "complete_cases": self.complete_cases,
+            "players": sorted(self.players),
+            "teams": sorted(self.teams),
+            "leagues": sorted(self.leagues),
+            "league_players": {k: sorted(v) for k, v in self.league_players.items()},
+            "league_teams": {k: sorted(v) for k, v in self.league_teams.items()},
+            "source_offset": self.source_offset,
+            "source_columns": self.source_columns,
+        }
+        years = np.array([self.year_min, self.year_max]) if self.year_min is not None else np.empty(0)
+
+        # replace the saved state atomically, so a failed write never loses the previous one
+        tmp_file = filename + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            np.savez(f, ids=self.ids.astype(str), totals=self.totals, years=years, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_file, filename)
+
+    def updateFromFile(self, filename, chunksize=100000, compact=False):
+        """
+            Folds in the rows appended to a CSV file since the last call, reading only the new bytes.
 
-            "hp": {"id": sum_hp.groupby('id').sum().idxmax(),
-                    "value": max_hp},
+            The aggregate remembers how far into the file it has read, so calling this again after rows are
+            appended costs time proportional to the new rows. A trailing partial line is left for the next
+            call.
 
-            "sb": {"id": bb_new['sb'].groupby('id').sum().idxmax(),
-                "value": bb_new['sb'].groupby('id').sum().max()},
+            Args:
+                filename (str): Path to the CSV file containing player data.
+                chunksize (int): Number of rows per chunk.
+                compact (bool): Read the rows with BASEBALL_SCHEMA.
 
-            "sbp": {"id": sum_sbp.groupby('id').sum().idxmax(),
-                "value": max_sbp},
+            Returns:
+                int: The number of new rows.
+            """
 
-            "so": {"id": bb_new['so'].groupby('id').sum().idxmax(),
-                   "value": bb_new['so'].groupby('id').sum().max()},
+        return self._readSource(filename, chunksize, compact, partial=False)
+
+    def _readSource(self, filename, chunksize, compact, partial):
+        """
+            Streams the rows of a CSV file from source_offset into the totals and moves source_offset past them.
+            With partial False a trailing line without a line break is left for the next call; with partial True
+            it is read too, as read_csv would.
+
+            Returns:
+                int: The number of rows read.
+            """
+
+        with open(filename, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if self.source_columns is None:
+                header = f.readline()
+                self.source_columns = list(pd.read_csv(io.BytesIO(header)).columns)
+                self.source_offset = len(header)
+            elif size < self.source_offset:
+                raise ValueError(f"{filename} is shorter than the data already aggregated")
+
+            end = size if partial else _lineEnd(f, self.source_offset, size)
+            f.seek(self.source_offset)
+            rows = 0
+            try:
+                reader = pd.read_csv(io.BufferedReader(_FileSlice(f, end - self.source_offset)), header=None,
+                                     names=self.source_columns, chunksize=chunksize,
+                                     dtype=_schema(self.source_columns) if compact else None)
+                for chunk in [reader] if chunksize is None else reader:
+                    self.update(chunk)
+                    rows += len(chunk)
+            except pd.errors.EmptyDataError:
+                # nothing but blank lines since the last call
+                pass
+
+        self.source_offset = end
+        return rows
+
+    def update(self, chunk):
+        """
+            Folds a DataFrame of player rows into the running totals.
+            """
+
+        self.record_count += len(chunk)
+        if len(chunk) == 0:
+            return
+
+        years = chunk['year'].dropna()
+        if len(years):
+            self.year_min = years.min() if self.year_min is None else min(self.year_min, years.min())
+            self.year_max = years.max() if self.year_max is None else max(self.year_max, years.max())
+
+        self.players.update(chunk['id'].dropna().unique())
+        self.teams.update(chunk['team'].dropna().unique())
+        self.leagues.update(chunk['lg'].dropna().unique())
+
+        complete = chunk.dropna()
+        self.complete_cases += len(complete)
+        self.float_columns.update(col for col in STAT_COLUMNS if pd.api.types.is_float_dtype(chunk[col].dtype))
+
+        for league in self.league_players:
+            dat = complete[complete['lg'] == league]
+            self.league_players[league].update(dat['id'].unique())
+            self.league_teams[league].update(dat['team'].unique())
+
+        totals = careerTotals(complete)
+        self._addTotals(totals.index.to_numpy(dtype=object), totals.to_numpy(dtype=float))
+
+    def merge(self, other):
+        """
+            Adds the totals of another aggregate (for example one built from a different file) into this one.
+
+            Returns:
+                BattingAggregate: This aggregate, for chaining.
+            """
+
+        self._addTotals(other.ids, other.totals)
+        self.float_columns |= other.float_columns
+        self.record_count += other.record_count
+        self.complete_cases += other.complete_cases
+        for attr, pick in (('year_min', min), ('year_max', max)):
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v is not None]
+            setattr(self, attr, pick(values) if values else None)
+        self.players |= other.players
+        self.teams |= other.teams
+        self.leagues |= other.leagues
+        for league in self.league_players:
+            self.league_players[league] |= other.league_players[league]
+            self.league_teams[league] |= other.league_teams[league]
+        return self
+
+    def _addTotals(self, ids, totals):
+        """
+            Adds per-player sums to the running totals, keeping the ids sorted.
+            """
 
-            "sop": {"id": sum_sop.groupby('id').sum().idxmax(),
-                    "value": max_sop},
+        if len(ids) == 0:
+            return
+        ids = np.concatenate([self.ids, ids])
+        self.ids, rows = np.unique(ids, return_inverse=True)
+        summed = np.zeros((len(self.ids), len(STAT_COLUMNS)))
+        np.add.at(summed, rows.ravel(), np.concatenate([self.totals, totals]))
+        self.totals = summed
 
-            "sopa": {"id": sum_sopa.groupby('id').sum().idxmax(),
-                    "value": max_sopa},
+    def careerTotals(self):
+        """
+            Returns:
+                pd.DataFrame: Career totals indexed by player id, with the dtypes careerTotals gives in memory.
+            """
 
-            "bb": {"id": bb_new['bb'].groupby('id').sum().idxmax(),
-                   "value": bb_new['bb'].groupby('id').sum().max()},
+        totals = pd.DataFrame(self.totals, index=pd.Index(self.ids, name='id'), columns=STAT_COLUMNS)
+        return totals.astype({col: 'int64' for col in STAT_COLUMNS if col not in self.float_columns})
 
-            "bbp": {"id": sum_bbp.groupby('id').sum().idxmax(),
-                    "value": max_bbp},
+    def results(self):
+        """
+            Returns:
+                dict: The bbanalyze summary for the aggregated rows, with None in place of the 'bb' and
+                      'nl'/'al' 'dat' frames.
+            """
 
-            "g": {"id": bb_new['g'].groupby('id').sum().idxmax(),
-                  "value": bb_new['g'].groupby('id').sum().max()},
+        return {
+            "record.count": self.record_count,
+            "complete.cases": self.complete_cases,
+            "years": (self.year_min, self.year_max),
+            "player.count": len(self.players),
+            "team.count": len(self.teams),
+            "league.count": len(self.leagues),
+            "bb": None,
+            "nl": {
+                "dat": None,
+                "players": len(self.league_players['NL']),
+                "teams": len(self.league_teams['NL'])
+            },
+            "al": {
+                "dat": None,
+                "players": len(self.league_players['AL']),
+                "teams": len(self.league_teams['AL'])
+            },
+            "records": computeRecords(self.careerTotals()),
         }
-    }
+
+
+class _LazyMapping(Mapping):
+    """
+        Read-only mapping whose values are built by the functions in self._builders on first access and
+        then memoized.
+        """
+
+    def __init__(self, builders):
+        self._builders = builders
+        self._values = {}
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            self._values[key] = self._builders[key]()
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._builders)
+
+    def __len__(self):
+        return len(self._builders)
+
+    def toDict(self):
+        """
+            Builds every entry and returns them as plain (nested) dictionaries.
+            """
+
+        return {k: v.toDict() if isinstance(v, _LazyMapping) else v for k, v in self.items()}
+
+
+class BattingAnalysis(_LazyMapping):
+    """
+        The bbanalyze results as a lazy mapping: each entry (and each entry of 'nl' and 'al') is computed the
+        first time it is read, so asking for res['record.count'] does not build the filtered frames or the
+        records.
+        """
+
+    def __init__(self, filename="baseball.csv", cache_dir=None, compact=False):
+        super().__init__({
+            "record.count": lambda: len(self.raw),
+            "complete.cases": lambda: len(self.complete),
+            "years": lambda: (self.raw['year'].min(), self.raw['year'].max()),
+            "player.count": lambda: self.raw['id'].nunique(),
+            "team.count": lambda: self.raw['team'].nunique(),
+            "league.count": lambda: self.raw['lg'].nunique(),
+            "bb": self._withRates,
+            "nl": lambda: self._league('NL'),
+            "al": lambda: self._league('AL'),
+            "records": lambda: computeRecords(careerTotals(self.complete)),
+        })
+        self._load = lambda: loadBaseball(filename, cache_dir, compact)
+        self._raw = None
+        self._complete = None
+
+    @property
+    def raw(self):
+        """
+            pd.DataFrame: Every row of the file, loaded on first use.
+            """
+
+        if self._raw is None:
+            self._raw = self._load()
+        return self._raw
+
+    @property
+    def complete(self):
+        """
+            pd.DataFrame: The rows without missing values.
+            """
+
+        if self._complete is None:
+            self._complete = self.raw.dropna()
+        return self._complete
+
+    def _withRates(self):
+        # Entire dataframe with obp and pab columns added
+        bb2 = self.complete
+        return bb2.assign(
+            obp=(bb2['h'] + bb2['bb'] + bb2['hbp']) / (bb2['ab'] + bb2['bb'] + bb2['hbp']),
+            pab=(bb2['h'] + bb2['bb'] + bb2['hbp'] + bb2['sf'] + bb2['sh']) / (
+                    bb2['ab'] + bb2['bb'] + bb2['hbp'] + bb2['sf'] + bb2['sh']))
+
+    def _league(self, league):
+        # the counts only need the id and team columns of the league's rows, not a copy of the whole frame
+        rows = cache(lambda: self.complete.loc[self.complete['lg'] == league, ['id', 'team']])
+        return _LazyMapping({
+            "dat": lambda: self["bb"][self["bb"]['lg'] == league],
+            "players": lambda: rows()['id'].nunique(),
+            "teams": lambda: rows()['team'].nunique(),
+        })
+
+
+def bbanalyze(filename="baseball.csv", cache_dir=None, compact=False, chunksize=None, lazy=False):
+    """
+        Analyze baseball player statistics from a CSV file.
+
+        Args:
+            filename (str): Path to the CSV file containing player data.
+            cache_dir (str or None): Folder for a columnar cache of the parsed file (see loadBaseball).
+                                     Defaults to None (always parse the CSV).
+            compact (bool): Load the data with BASEBALL_SCHEMA, so the 'bb', 'nl' and 'al' frames use
+                            categorical 'id', 'team' and 'lg' columns, nullable Int8/Int16/Int32 stat columns
+                            and Float64 'obp'/'pab' columns. Defaults to False (the dtypes pd.read_csv infers:
+                            object text, int64 and float64 stats).
+            chunksize (int or None): Read the file this many rows at a time and fold each chunk into a
+                                     BattingAggregate, so memory does not grow with the file size. The
+                                     'bb' and 'nl'/'al' 'dat' frames are None in this mode, and cache_dir is
+                                     not used. Defaults to None (load the whole file).
+            lazy (bool): Return a BattingAnalysis that builds each entry on first access instead of a dict.
+                         Defaults to False.
+
+        Returns:
+            dict: Summary of baseball statistics, including player and league metrics.
+        """
+
+    if chunksize is not None:
+        return BattingAggregate.fromFile(filename, chunksize, compact).results()
+
+    analysis = BattingAnalysis(filename, cache_dir, compact)
+
     # Returns the calculated values in a dictionary
-    return results
\ No newline at end of file
+    return analysis if lazy else analysis.toDict()
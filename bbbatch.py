@@ -0,0 +1,62 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from bbanalyze import BattingAggregate
+
+
+def _aggregateFile(filename, chunksize=None, compact=False):
+    """
+    Worker task: reduces one file to its BattingAggregate, which pickles as a few arrays and sets
+    instead of DataFrames.
+    """
+    return BattingAggregate.fromFile(filename, chunksize, compact)
+
+
+def bbbatch(files, workers=None, chunksize=None, compact=False):
+    """
+    Analyze many baseball CSV files across a pool of worker processes.
+
+    Args:
+        files (str or list): A glob pattern or a list of CSV file paths.
+        workers (int or None): Number of worker processes. Defaults to os.cpu_count(); 1 runs in this process.
+        chunksize (int or None): Rows per chunk when reading each file (see BattingAggregate.fromFile).
+                                 Defaults to None (read each file at once).
+        compact (bool): Read the files with BASEBALL_SCHEMA. Defaults to False.
+
+    Returns:
+        dict: The matched 'files', the per-file bbanalyze summaries in 'results' (keyed by file) and the
+              summary of all files combined in 'merged'. The summaries come from
+              BattingAggregate.results(), so they have no 'bb' or 'dat' frames.
+    """
+    if isinstance(files, str):
+        files = sorted(glob.glob(files))
+    files = list(files)
+
+    task = partial(_aggregateFile, chunksize=chunksize, compact=compact)
+    if workers == 1 or len(files) <= 1:
+        aggregates = [task(f) for f in files]
+    else:
+        workers = min(workers or os.cpu_count(), len(files))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            aggregates = list(pool.map(task, files, chunksize=max(1, len(files) // (workers * 4))))
+
+    merged = BattingAggregate()
+    for aggregate in aggregates:
+        merged.merge(aggregate)
+
+    return {
+        "files": files,
+        "results": {f: aggregate.results() for f, aggregate in zip(files, aggregates)},
+        "merged": merged.results(),
+    }
+
+
+if __name__ == "__main__":
+    result = bbbatch("bb*.csv")
+
+    print("Files:", result["files"])
+    print("Record Count:", result["merged"]["record.count"])
+    print("Player Count:", result["merged"]["player.count"])
+    print("Records:", result["merged"]["records"])
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from bbanalyze import STAT_COLUMNS, RECORD_NAMES, MIN_AB, loadBaseball, recordStats
+
+
+class Leaderboard:
+    """
+    Top-K leaderboards for the bbanalyze record statistics, by league and year range.
+
+    The complete cases are summed once per (player, league, year) into a small matrix. A query sums the
+    matching rows of that matrix per player and picks the top K with np.argpartition, so it costs O(n) in the
+    number of (player, league, year) groups instead of a sort of every row. Queries without a year range reuse
+    a precomputed sort order and cost O(K).
+
+    Ties are broken by player id, so the same query always gives the same leaderboard, and the first entry
+    matches bbanalyze's record holder.
+    """
+
+    def __init__(self, bb2):
+        """
+        Args:
+            bb2 (pd.DataFrame): Complete cases of the player data (for example bbanalyze(...)['bb']).
+        """
+        stats = bb2[STAT_COLUMNS].astype(float)
+        groups = stats.groupby([bb2['id'], bb2['lg'], bb2['year']], observed=True).sum()
+
+        ids = groups.index.get_level_values('id')
+        self.players, self._player = np.unique(np.asarray(ids, dtype=object), return_inverse=True)
+        self._league = np.asarray(groups.index.get_level_values('lg'), dtype=object)
+        self._year = np.asarray(groups.index.get_level_values('year'))
+        self._totals = groups.to_numpy()
+        self._orders = {}
+
+    @classmethod
+    def fromFile(cls, filename="baseball.csv", compact=False):
+        """
+        Builds the leaderboard from the complete cases of a CSV file.
+        """
+        return cls(loadBaseball(filename, compact=compact).dropna())
+
+    def _playerTotals(self, rows):
+        """
+        Sums the selected (player, league, year) groups per player.
+
+        Returns:
+            np.ndarray: One row of STAT_COLUMNS totals per player in self.players.
+        """
+        player = self._player if rows is None else self._player[rows]
+        totals = self._totals if rows is None else self._totals[rows]
+        return np.column_stack([np.bincount(player, weights=totals[:, j], minlength=len(self.players))
+                                for j in range(len(STAT_COLUMNS))])
+
+    def _values(self, totals, stat, min_ab):
+        """
+        Calculates a record statistic per player, with -inf for players who are not eligible.
+        """
+        columns = dict(zip(STAT_COLUMNS, totals.T))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = recordStats(columns)[stat].astype(float)
+        values[~(columns['ab'] > min_ab) | np.isnan(values)] = -np.inf
+        return values
+
+    def top(self, stat, k=10, league=None, years=None, min_ab=MIN_AB):
+        """
+        Finds the K players with the highest value of a record statistic.
+
+        Args:
+            stat (str): One of the bbanalyze record names (see RECORD_NAMES).
+            k (int): Number of players to return.
+            league (str or None): Only count rows from this league, for example 'NL'. Defaults to all leagues.
+            years (tuple or None): Only count rows with first <= year <= last. Defaults to all years.
+            min_ab (int): Players need more than this many at-bats in the selected rows to be eligible.
+
+        Returns:
+            pd.DataFrame: Columns 'id' and 'value', ranked from 1, with ties ordered by id.
+        """
+        if stat not in RECORD_NAMES:
+            raise KeyError(f"unknown statistic {stat!r}, expected one of {RECORD_NAMES}")
+
+        if years is None:
+            # no year range: sort once per league, then every query is a slice
+            key = (stat, league, min_ab)
+            if key not in self._orders:
+                rows = None if league is None else np.flatnonzero(self._league == league)
+                values = self._values(self._playerTotals(rows), stat, min_ab)
+                eligible = np.flatnonzero(values > -np.inf)
+                order = eligible[np.lexsort((eligible, -values[eligible]))]
+                self._orders[key] = (order, values[order])
+            order, values = self._orders[key]
+            return self._frame(order[:k], values[:k])
+
+        mask = (self._year >= years[0]) & (self._year <= years[1])
+        if league is not None:
+            mask &= self._league == league
+        values = self._values(self._playerTotals(np.flatnonzero(mask)), stat, min_ab)
+
+        eligible = np.flatnonzero(values > -np.inf)
+        if len(eligible) > k:
+            # everything above the K-th largest value, plus every player tied with it
+            kth = values[eligible[np.argpartition(-values[eligible], k - 1)[k - 1]]]
+            eligible = eligible[values[eligible] >= kth]
+        order = eligible[np.lexsort((eligible, -values[eligible]))][:k]
+        return self._frame(order, values[order])
+
+    def _frame(self, order, values):
+        """
+        Builds the leaderboard DataFrame for players in rank order.
+        """
+        return pd.DataFrame({"id": self.players[order], "value": values},
+                            index=pd.RangeIndex(1, len(order) + 1))
+
+
+if __name__ == "__main__":
+    leaderboard = Leaderboard.fromFile("baseball.csv")
+
+    print("Career home runs:")
+    print(leaderboard.top("hr"))
+    print("\nNL on-base percentage, 1990-1999:")
+    print(leaderboard.top("obp", league="NL", years=(1990, 1999)))
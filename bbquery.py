@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from bbanalyze import STAT_COLUMNS, MIN_AB, computeRecords, loadBaseball
+
+
+class BattingIndex:
+    """
+    Answers filtered bbanalyze summaries (by year range, team and league) from prebuilt row indexes.
+
+    The rows are sorted by year once, so a year range is a contiguous slice found with a binary search. Each
+    team and league keeps the sorted positions of its rows in that order, so a filter only touches the rows it
+    matches. The id, team, league, year and stat columns are kept as NumPy arrays in the same order.
+    """
+
+    def __init__(self, bb):
+        """
+        Args:
+            bb (pd.DataFrame): Every row of the player data, as loaded by loadBaseball.
+        """
+        self.bb = bb
+        self.order = np.argsort(bb['year'].to_numpy(dtype=float), kind='stable')
+        rows = bb.iloc[self.order]
+
+        self.years = rows['year'].to_numpy()
+        self.complete = rows.notna().all(axis=1).to_numpy()
+
+        # text columns as integer codes (-1 for missing values); player codes follow sorted id order
+        self.ids, self.id_codes = self._codes(rows['id'])
+        self.teams, self.team_codes = self._codes(rows['team'])
+        self.leagues, self.league_codes = self._codes(rows['lg'])
+
+        self.stats = np.column_stack([rows[col].to_numpy(dtype=float, na_value=np.nan) for col in STAT_COLUMNS])
+        self.integer_columns = [col for col in STAT_COLUMNS if pd.api.types.is_integer_dtype(bb[col].dtype)]
+
+        # positions (in year order) of each team's and each league's rows
+        self.team_rows = self._positions(self.teams, self.team_codes)
+        self.league_rows = self._positions(self.leagues, self.league_codes)
+
+    @classmethod
+    def fromFile(cls, filename="baseball.csv", cache_dir=None, compact=False):
+        """
+        Loads a CSV file (see loadBaseball) and indexes it.
+        """
+        return cls(loadBaseball(filename, cache_dir, compact))
+
+    @staticmethod
+    def _codes(column):
+        codes, uniques = pd.factorize(column, sort=True)
+        return np.asarray(uniques, dtype=object), codes
+
+    @staticmethod
+    def _positions(uniques, codes):
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+    def select(self, years=None, team=None, lg=None):
+        """
+        Finds the rows matching every given filter.
+
+        Args:
+            years (tuple or None): Keep rows with first <= year <= last. Defaults to all years.
+            team (str or None): Keep rows of this team. Defaults to all teams.
+            lg (str or None): Keep rows of this league. Defaults to all leagues.
+
+        Returns:
+            np.ndarray: Sorted positions of the matching rows in year order.
+        """
+        if years is None:
+            start, stop = 0, len(self.years)
+        else:
+            start = np.searchsorted(self.years, years[0], side='left')
+            stop = np.searchsorted(self.years, years[1], side='right')
+
+        rows = None
+        for value, positions in ((team, self.team_rows), (lg, self.league_rows)):
+            if value is None:
+                continue
+            matches = positions.get(value, np.empty(0, dtype=np.intp))
+            matches = matches[np.searchsorted(matches, start):np.searchsorted(matches, stop)]
+            rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+
+        return np.arange(start, stop) if rows is None else rows
+
+    def frame(self, years=None, team=None, lg=None):
+        """
+        Returns:
+            pd.DataFrame: The rows of the original data matching the filters, in their original order.
+        """
+        return self.bb.iloc[np.sort(self.order[self.select(years, team, lg)])]
+
+    def summary(self, years=None, team=None, lg=None):
+        """
+        Calculates the bbanalyze counts and records for the rows matching the filters.
+
+        Args:
+            years (tuple or None): Keep rows with first <= year <= last. Defaults to all years.
+            team (str or None): Keep rows of this team. Defaults to all teams.
+            lg (str or None): Keep rows of this league. Defaults to all leagues.
+
+        Returns:
+            dict: The bbanalyze summary of the matching rows, with None in place of the 'bb' and 'nl'/'al'
+                  'dat' frames (use frame() for the rows themselves).
+        """
+        rows = self.select(years, team, lg)
+        complete = rows[self.complete[rows]]
+
+        leagues = {}
+        for league in ('NL', 'AL'):
+            league_rows = complete[self.league_codes[complete] == self._code(self.leagues, league)]
+            leagues[league] = {
+                "dat": None,
+                "players": self._distinct(self.id_codes[league_rows]),
+                "teams": self._distinct(self.team_codes[league_rows]),
+            }
+
+        return {
+            "record.count": len(rows),
+            "complete.cases": len(complete),
+            "years": (self.years[rows].min(), self.years[rows].max()) if len(rows) else (None, None),
+            "player.count": self._distinct(self.id_codes[rows]),
+            "team.count": self._distinct(self.team_codes[rows]),
+            "league.count": self._distinct(self.league_codes[rows]),
+            "bb": None,
+            "nl": leagues['NL'],
+            "al": leagues['AL'],
+            "records": computeRecords(*self._careerTotals(complete)),
+        }
+
+    def _careerTotals(self, complete):
+        """
+        Sums STAT_COLUMNS per player over the given complete rows, keeping the loaded integer dtypes.
+
+        Returns:
+            tuple: The totals as a dict of arrays, the minimum at-bats and the matching player ids, ready for
+                   computeRecords.
+        """
+        players = np.unique(self.id_codes[complete])
+        slots = np.searchsorted(players, self.id_codes[complete])
+        totals = {}
+        for j, col in enumerate(STAT_COLUMNS):
+            totals[col] = np.bincount(slots, weights=self.stats[complete, j], minlength=len(players))
+            if col in self.integer_columns:
+                totals[col] = totals[col].astype(np.int64)
+        return totals, MIN_AB, self.ids[players]
+
+    @staticmethod
+    def _code(uniques, value):
+        position = np.searchsorted(uniques, value)
+        return position if position < len(uniques) and uniques[position] == value else -2
+
+    @staticmethod
+    def _distinct(codes):
+        return len(np.unique(codes[codes >= 0]))
+
+
+if __name__ == "__main__":
+    index = BattingIndex.fromFile("baseball.csv")
+
+    summary = index.summary(years=(1990, 1999), lg='NL')
+    print("NL, 1990-1999")
+    print("Record Count:", summary["record.count"])
+    print("Player Count:", summary["player.count"])
+    print("Records:", summary["records"])
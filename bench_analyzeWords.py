@@ -0,0 +1,244 @@
+"""
+Benchmarks for analyzeWords.
+
+Run with:  python bench_analyzeWords.py [max_words]
+where max_words is the largest corpus in the scaling run (default 10,000,000).
+"""
+import os
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import wordMatcher
+from analyzeWords import WordMetrics, analyzeWords, analyzeWordsStream, analyzeWordsParallel
+
+
+def makeCorpus(size, seed=0, source="words.csv"):
+    """
+    Draws a corpus of `size` words, with replacement, from the words in the source file.
+
+    Returns:
+        pd.Series: The corpus.
+    """
+    words = pd.read_csv(source)['x'].to_numpy()
+    return pd.Series(words[np.random.default_rng(seed).integers(0, len(words), size)], name='x')
+
+
+def legacyAnalyzeWords(words):
+    """
+    The original loop, which rescans the whole Series on every iteration. Used as the benchmark baseline.
+    """
+    letter_counts = {chr(i): 0 for i in range(ord('a'), ord('z') + 1)}
+    max_char = 0
+    size_counts = {}
+    for word in words:
+        word = str(word).lower()
+        first_letter = word[0] if word else ""
+        if first_letter.isalpha():
+            letter_counts[first_letter] += 1
+        max_char = max(max_char, len(word))
+        size_counts[len(word)] = size_counts.get(len(word), 0) + 1
+        oo_words = words[words.str.contains("oo")]
+        words_6plus = words[words.str.len() >= 6].str.lower()
+    return letter_counts, max_char, size_counts, oo_words, words_6plus
+
+
+def benchScaling(max_words=10 ** 7, legacy_limit=1000):
+    """
+    Times analyzeWords on corpora from 1,000 words up to max_words, and the original loop up to legacy_limit.
+    """
+    print("analyzeWords scaling")
+    size = 1000
+    while size <= max_words:
+        corpus = makeCorpus(size)
+        current = timeit.timeit(lambda: analyzeWords(corpus), number=1)
+        line = f"  {size:>11,d} words  {current * 1000:10.2f} ms"
+        if size <= legacy_limit:
+            legacy = timeit.timeit(lambda: legacyAnalyzeWords(corpus), number=1)
+            line += f"   original {legacy * 1000:10.2f} ms ({legacy / current:.0f}x)"
+        print(line)
+        size *= 10
+
+
+def peakMemory(func):
+    """
+    Runs func and returns its elapsed time and the peak memory traced while it ran.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def benchStream(size=10 ** 6, chunksize=100000):
+    """
+    Compares time and peak traced memory of loading a word file for analyzeWords against streaming it.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "corpus.csv")
+        makeCorpus(size).to_frame().to_csv(filename, index=False)
+
+        runs = [
+            ("in memory", lambda: analyzeWords(pd.read_csv(filename)['x'])),
+            ("stream", lambda: analyzeWordsStream(filename, chunksize)),
+            ("stream+spill", lambda: analyzeWordsStream(filename, chunksize, spill_dir=os.path.join(tmp, "spill"))),
+            ("stream counts", lambda: analyzeWordsStream(filename, chunksize, keep_words=False)),
+        ]
+        print(f"{size:,d} word file, {chunksize:,d} words per batch")
+        for name, run in runs:
+            elapsed, peak = peakMemory(run)
+            print(f"  {name:14s} {elapsed * 1000:10.2f} ms   peak {peak / 2 ** 20:8.1f} MiB")
+
+
+def benchParallel(size=10 ** 6, chunksize=100000):
+    """
+    Times the serial stream against the parallel driver with 1 up to os.cpu_count() (at least 2) workers.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "corpus.csv")
+        makeCorpus(size).to_frame().to_csv(filename, index=False)
+
+        start = time.perf_counter()
+        analyzeWordsStream(filename, chunksize)
+        serial = time.perf_counter() - start
+        print(f"{size:,d} word file, {os.cpu_count()} CPUs")
+        print(f"  serial        {serial * 1000:10.2f} ms")
+
+        for workers in sorted({1, 2, max(2, os.cpu_count() or 1)}):
+            start = time.perf_counter()
+            analyzeWordsParallel(filename, workers, chunksize)
+            elapsed = time.perf_counter() - start
+            print(f"  {workers:2d} workers    {elapsed * 1000:10.2f} ms   speedup {serial / elapsed:5.2f}x")
+
+
+def makeDistinctCorpus(size, distinct, seed=0):
+    """
+    Draws a corpus of `size` words, with replacement, from about `distinct` random lower-case words of 3 to 12
+    letters, so that most words are distinct (unlike makeCorpus, which has under a thousand).
+
+    Returns:
+        pd.Series: The corpus.
+    """
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    vocabulary = np.unique(["".join(rng.choice(letters, n)) for n in rng.integers(3, 13, distinct)])
+    return pd.Series(vocabulary[rng.integers(0, len(vocabulary), size)], dtype=object, name='x')
+
+
+def benchPatterns(size=10 ** 6, counts=(1, 4, 16, 64, 256, 1024)):
+    """
+    Compares counting with one str.contains pass per pattern against the pattern matcher, as the number of
+    patterns grows, on a corpus of few distinct words and on one of mostly distinct words. The matcher runs one
+    search per pattern over the distinct words below wordMatcher.AUTOMATON_PATTERNS patterns and the automaton
+    above; both are timed at every count (best of 3). Only counts are kept, so the times are those of the
+    matching.
+    """
+    rng = np.random.default_rng(0)
+    for name, words in [("words.csv vocabulary", makeCorpus(size)),
+                        ("random words", makeDistinctCorpus(size, size // 5))]:
+        vocabulary = words.drop_duplicates().str.lower()
+        grams = sorted({word[i:i + n] for word in vocabulary[:5000] for n in (2, 3, 4)
+                        for i in range(len(word) - n + 1)})
+
+        baseline = min(timeit.repeat(lambda: analyzeWordsStream([words], keep_words=False), number=1, repeat=3))
+        print(f"{size:,d} words, {len(vocabulary):,d} distinct ({name}): analyzeWords counts without patterns "
+              f"{baseline * 1000:.2f} ms; extra time with patterns:")
+        for count in counts:
+            patterns = list(rng.choice(grams, min(count, len(grams)), replace=False))
+
+            contains = np.nan
+            if count <= 64:
+                start = time.perf_counter()
+                for pattern in patterns:
+                    int(words.str.contains(pattern, regex=False).sum())
+                contains = time.perf_counter() - start
+
+            times = []
+            for threshold in (10 ** 9, 0):
+                with mock.patch.object(wordMatcher, 'AUTOMATON_PATTERNS', threshold):
+                    run = lambda: analyzeWordsStream([words], keep_words=False, patterns=patterns)
+                    times.append(min(timeit.repeat(run, number=1, repeat=3)) - baseline)
+
+            print(f"  {len(patterns):5d} patterns   str.contains {contains * 1000:10.2f} ms   "
+                  f"search {times[0] * 1000:10.2f} ms   automaton {times[1] * 1000:10.2f} ms")
+
+
+def dictHistograms(words, letter_counts, size_counts):
+    """
+    The dict histogram updates WordMetrics used before the array histograms. Used as the benchmark baseline.
+    """
+    lowered = words.astype(str).str.lower()
+    lengths = lowered.str.len()
+    first_counts = lowered.str[:1].value_counts()
+    for letter in letter_counts:
+        letter_counts[letter] += int(first_counts.get(letter, 0))
+    length_counts = lengths.value_counts()
+    for size in lengths.unique():
+        size_counts[int(size)] = size_counts.get(int(size), 0) + int(length_counts[size])
+
+
+def benchHistograms(size=10 ** 6, batch=100000, shards=10000):
+    """
+    Times filling the letter and size histograms batch by batch, and merging many small WordMetrics, with
+    the array histograms against the dict histograms they replace. The batches go through the public
+    WordMetrics.update, which also counts the 'oo' and 6+ character words, so the arrays are timed with that
+    extra work.
+    """
+    words = makeCorpus(size)
+    batches = [words[start:start + batch] for start in range(0, size, batch)]
+
+    start = time.perf_counter()
+    metrics = WordMetrics(keep_words=False)
+    for words_batch in batches:
+        metrics.update(words_batch)
+    metrics.result()
+    arrays = time.perf_counter() - start
+
+    start = time.perf_counter()
+    letter_counts, size_counts = dict.fromkeys(metrics.letter_counts, 0), {}
+    for words_batch in batches:
+        dictHistograms(words_batch, letter_counts, size_counts)
+    dicts = time.perf_counter() - start
+    print(f"{size:,d} words in batches of {batch:,d}: arrays {arrays * 1000:.2f} ms, dicts {dicts * 1000:.2f} ms")
+
+    parts = []
+    for start in range(0, shards * 100, 100):
+        part = WordMetrics(keep_words=False)
+        part.update(words[start:start + 100])
+        parts.append(part)
+
+    start = time.perf_counter()
+    merged = WordMetrics(keep_words=False)
+    for part in parts:
+        merged.merge(part)
+    merged.result()
+    arrays = time.perf_counter() - start
+
+    part_dicts = [(part.letter_counts, part.size_counts) for part in parts]
+    start = time.perf_counter()
+    letter_counts, size_counts = dict.fromkeys(merged.letter_counts, 0), {}
+    for part_letters, part_sizes in part_dicts:
+        for letter, count in part_letters.items():
+            letter_counts[letter] += count
+        for length, count in part_sizes.items():
+            size_counts[length] = size_counts.get(length, 0) + count
+    dicts = time.perf_counter() - start
+    print(f"merge {shards:,d} shards of 100 words: arrays {arrays * 1000:.2f} ms, dicts {dicts * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    benchScaling(int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7)
+    benchStream()
+    benchParallel()
+    benchPatterns()
+    benchHistograms()
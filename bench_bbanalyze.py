@@ -0,0 +1,327 @@
+"""
+Benchmarks for bbanalyze.
+
+Run with:  python bench_bbanalyze.py [scale]
+where scale is how many copies of baseball.csv go into the synthetic file (default 100).
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from bbbatch import bbbatch
+from bbleaderboard import Leaderboard
+from bbquery import BattingIndex
+from bbanalyze import bbanalyze, STAT_COLUMNS, computeRecords, careerTotals, loadBaseball
+
+
+def makeSynthetic(filename, scale, source="baseball.csv"):
+    """
+    Writes a synthetic batting file made of `scale` copies of the source file, each copy with its own player ids.
+
+    Args:
+        filename (str): Path of the file to write.
+        scale (int): Number of copies of the source data.
+        source (str): Batting file to copy.
+
+    Returns:
+        str: The filename written.
+    """
+    bb = pd.read_csv(source)
+    copies = []
+    for i in range(scale):
+        copy = bb.copy()
+        copy['id'] = copy['id'] + f"_{i}"
+        copies.append(copy)
+    pd.concat(copies).to_csv(filename, index=False)
+    return filename
+
+
+def legacyRecords(bb2):
+    """
+    The original per-record computation: one groupby per record, used as the benchmark baseline.
+    """
+    sum_values = bb2[['id'] + STAT_COLUMNS].groupby('id').sum()
+    bb_new = sum_values[(sum_values['ab'] > 50)]
+    ratios = {
+        "obp": (bb_new['h'] + bb_new['bb'] + bb_new['hbp']) / (bb_new['ab'] + bb_new['bb'] + bb_new['hbp']),
+        "pab": (bb_new['h'] + bb_new['bb'] + bb_new['hbp'] + bb_new['sf'] + bb_new['sh']) / (
+                bb_new['ab'] + bb_new['bb'] + bb_new['hbp'] + bb_new['sf'] + bb_new['sh']),
+        "hrp": bb_new['hr'] / bb_new['ab'],
+        "hp": bb_new['h'] / bb_new['ab'],
+        "sbp": bb_new['sb'] / bb_new['ab'],
+        "sop": bb_new['so'] / bb_new['ab'],
+        "sopa": bb_new['so'] / (bb_new['ab'] + bb_new['bb'] + bb_new['hbp'] + bb_new['sf'] + bb_new['sh']),
+        "bbp": bb_new['bb'] / bb_new['ab'],
+    }
+    records = {}
+    for name, ratio in ratios.items():
+        records[name] = {"id": ratio.groupby('id').sum().idxmax(), "value": ratio.max()}
+    for col in ['hr', 'h', 'sb', 'so', 'bb', 'g']:
+        records[col] = {"id": bb_new[col].groupby('id').sum().idxmax(),
+                        "value": bb_new[col].groupby('id').sum().max()}
+    return records
+
+
+def benchRecords(filename, repeat=5):
+    """
+    Times the legacy per-record groupbys against computeRecords on an already loaded file.
+    """
+    bb2 = pd.read_csv(filename).dropna()
+
+    legacy = min(timeit.repeat(lambda: legacyRecords(bb2), number=1, repeat=repeat))
+    engine = min(timeit.repeat(
+        lambda: computeRecords(bb2[['id'] + STAT_COLUMNS].groupby('id').sum()), number=1, repeat=repeat))
+
+    print(f"{os.path.basename(filename)}: {len(bb2)} complete rows")
+    print(f"  legacy records: {legacy * 1000:9.2f} ms")
+    print(f"  single pass:    {engine * 1000:9.2f} ms  ({legacy / engine:.1f}x)")
+
+
+def benchCache(filename, repeat=5):
+    """
+    Times a plain read_csv against cold (snapshot written) and warm (snapshot read) cached loads, and a warm
+    compact load, whose categorical columns are built straight from the snapshot codes.
+    """
+    cache_dir = tempfile.mkdtemp()
+    try:
+        plain = min(timeit.repeat(lambda: pd.read_csv(filename), number=1, repeat=repeat))
+
+        start = time.perf_counter()
+        loadBaseball(filename, cache_dir)
+        cold = time.perf_counter() - start
+
+        warm = min(timeit.repeat(lambda: loadBaseball(filename, cache_dir), number=1, repeat=repeat))
+        compact = min(timeit.repeat(lambda: loadBaseball(filename, cache_dir, compact=True), number=1,
+                                    repeat=repeat))
+    finally:
+        shutil.rmtree(cache_dir)
+
+    print(f"{os.path.basename(filename)}: cached load")
+    print(f"  read_csv:       {plain * 1000:9.2f} ms")
+    print(f"  cold cache:     {cold * 1000:9.2f} ms")
+    print(f"  warm cache:     {warm * 1000:9.2f} ms  ({plain / warm:.1f}x)")
+    print(f"  warm compact:   {compact * 1000:9.2f} ms  ({plain / compact:.1f}x)")
+
+
+def memoryReport(filename):
+    """
+    Compares the resident memory of each column under the default loader and BASEBALL_SCHEMA.
+
+    Returns:
+        pd.DataFrame: Bytes per column for both loaders, with a total row.
+    """
+    default = loadBaseball(filename).memory_usage(deep=True, index=False)
+    compact = loadBaseball(filename, compact=True).memory_usage(deep=True, index=False)
+    report = pd.DataFrame({"default": default, "compact": compact})
+    report.loc["total"] = report.sum()
+    report["ratio"] = (report["default"] / report["compact"]).round(1)
+    return report
+
+
+def benchSchema(filename, repeat=5):
+    """
+    Prints the memory report and times the groupby('id') and nunique() calls under both loaders.
+    """
+    print(f"{os.path.basename(filename)}: memory by column (bytes)")
+    print(memoryReport(filename).to_string())
+
+    for name, compact in [("default", False), ("compact", True)]:
+        bb = loadBaseball(filename, compact=compact)
+        bb2 = bb.dropna()
+        grouped = min(timeit.repeat(lambda: careerTotals(bb2), number=1, repeat=repeat))
+        unique = min(timeit.repeat(lambda: [bb[col].nunique() for col in ['id', 'team', 'lg']],
+                                   number=1, repeat=repeat))
+        print(f"  {name:8s} groupby: {grouped * 1000:8.2f} ms   nunique: {unique * 1000:8.2f} ms")
+
+
+def peakMemory(func):
+    """
+    Runs func and returns its elapsed time and the peak memory traced while it ran.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def benchChunked(filename, chunksize=50000):
+    """
+    Compares time and peak traced memory of the in-memory and chunked bbanalyze.
+    """
+    print(f"{os.path.basename(filename)}: in-memory vs chunked ({chunksize} rows)")
+    for name, kwargs in [("in-memory", {}), ("chunked", {"chunksize": chunksize})]:
+        elapsed, peak = peakMemory(lambda: bbanalyze(filename, **kwargs))
+        print(f"  {name:10s} {elapsed * 1000:9.2f} ms   peak {peak / 2 ** 20:8.1f} MiB")
+
+
+def benchLazy(filename, repeat=5):
+    """
+    Times single-key access on the lazy result against building the full results dictionary.
+    """
+    print(f"{os.path.basename(filename)}: lazy access vs full build")
+    full = min(timeit.repeat(lambda: bbanalyze(filename), number=1, repeat=repeat))
+    print(f"  full build:        {full * 1000:9.2f} ms")
+    for key in ['record.count', 'player.count', 'records', 'nl']:
+        if key == 'nl':
+            access = lambda: bbanalyze(filename, lazy=True)['nl']['players']
+        else:
+            access = lambda: bbanalyze(filename, lazy=True)[key]
+        single = min(timeit.repeat(access, number=1, repeat=repeat))
+        print(f"  {key:18s} {single * 1000:9.2f} ms  ({full / single:.1f}x)")
+
+
+def makeSeasons(folder, count=200, source="baseball.csv"):
+    """
+    Writes `count` synthetic season files, each a copy of one year of the source file with its own player ids.
+
+    Returns:
+        list: The filenames written.
+    """
+    bb = pd.read_csv(source)
+    years = sorted(bb['year'].unique())
+    files = []
+    for i in range(count):
+        season = bb[bb['year'] == years[i % len(years)]].copy()
+        season['id'] = season['id'] + f"_{i // len(years)}"
+        files.append(os.path.join(folder, f"season_{i:03d}.csv"))
+        season.to_csv(files[-1], index=False)
+    return files
+
+
+def benchBatch(count=200):
+    """
+    Times bbbatch over `count` season files with increasing worker counts.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        files = makeSeasons(tmp, count)
+        print(f"bbbatch over {count} season files")
+        serial = None
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            start = time.perf_counter()
+            bbbatch(files, workers=workers)
+            elapsed = time.perf_counter() - start
+            serial = serial or elapsed
+            print(f"  {workers:3d} workers {elapsed * 1000:9.2f} ms  ({serial / elapsed:.1f}x)")
+            workers *= 2
+
+
+def benchLeaderboard(filename, queries=200, k=10, seed=0):
+    """
+    Times random top-K queries (stat, league, year range) on a Leaderboard against pandas scans of the rows.
+    """
+    bb2 = bbanalyze(filename)['bb']
+    rng = np.random.default_rng(seed)
+    names = ['hr', 'h', 'sb', 'so', 'bb', 'g']
+    plan = []
+    for _ in range(queries):
+        first = int(rng.integers(1871, 2008))
+        plan.append((names[rng.integers(len(names))], [None, 'NL', 'AL'][rng.integers(3)],
+                     (first, first + int(rng.integers(0, 20)))))
+
+    def scan():
+        for stat, league, years in plan:
+            rows = bb2[(bb2['year'] >= years[0]) & (bb2['year'] <= years[1])]
+            if league is not None:
+                rows = rows[rows['lg'] == league]
+            totals = careerTotals(rows)
+            totals[totals['ab'] > 50][stat].sort_values(ascending=False).head(k)
+
+    start = time.perf_counter()
+    leaderboard = Leaderboard(bb2)
+    build = time.perf_counter() - start
+
+    def indexed():
+        for stat, league, years in plan:
+            leaderboard.top(stat, k, league=league, years=years)
+
+    scanned = min(timeit.repeat(scan, number=1, repeat=3))
+    queried = min(timeit.repeat(indexed, number=1, repeat=3))
+    print(f"{os.path.basename(filename)}: {queries} top-{k} queries")
+    print(f"  pandas scans:   {scanned * 1000:9.2f} ms")
+    print(f"  leaderboard:    {queried * 1000:9.2f} ms  ({scanned / queried:.1f}x, built in {build * 1000:.1f} ms)")
+
+
+def scanSummary(bb, years=None, team=None, lg=None):
+    """
+    The full-scan baseline for BattingIndex.summary: boolean masks over every row, then the bbanalyze counts.
+    """
+    mask = pd.Series(True, index=bb.index)
+    if years is not None:
+        mask &= (bb['year'] >= years[0]) & (bb['year'] <= years[1])
+    if team is not None:
+        mask &= bb['team'] == team
+    if lg is not None:
+        mask &= bb['lg'] == lg
+    rows = bb[mask]
+    bb2 = rows.dropna()
+    return {
+        "record.count": len(rows),
+        "complete.cases": len(bb2),
+        "player.count": rows['id'].nunique(),
+        "team.count": rows['team'].nunique(),
+        "nl": bb2.loc[bb2['lg'] == 'NL', 'id'].nunique(),
+        "al": bb2.loc[bb2['lg'] == 'AL', 'id'].nunique(),
+        "records": computeRecords(careerTotals(bb2)),
+    }
+
+
+def benchQueries(filename, queries=1000, seed=0):
+    """
+    Times random year/team/league summaries on a BattingIndex against repeated full scans.
+    """
+    bb = loadBaseball(filename)
+    rng = np.random.default_rng(seed)
+    teams = bb['team'].dropna().unique()
+    plan = []
+    for _ in range(queries):
+        first = int(rng.integers(1871, 2008))
+        query = {"years": (first, first + int(rng.integers(0, 30)))}
+        if rng.random() < 0.5:
+            query["team"] = teams[rng.integers(len(teams))]
+        if rng.random() < 0.5:
+            query["lg"] = ['NL', 'AL'][rng.integers(2)]
+        plan.append(query)
+
+    start = time.perf_counter()
+    index = BattingIndex(bb)
+    build = time.perf_counter() - start
+
+    scanned = timeit.timeit(lambda: [scanSummary(bb, **q) for q in plan], number=1)
+    queried = timeit.timeit(lambda: [index.summary(**q) for q in plan], number=1)
+    print(f"{os.path.basename(filename)}: {queries} filtered summaries")
+    print(f"  full scans:     {scanned * 1000:9.2f} ms")
+    print(f"  index:          {queried * 1000:9.2f} ms  ({scanned / queried:.1f}x, built in {build * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    benchRecords("baseball.csv")
+    benchCache("baseball.csv")
+    benchSchema("baseball.csv")
+    benchChunked("baseball.csv")
+    benchLazy("baseball.csv")
+    benchLeaderboard("baseball.csv")
+    benchQueries("baseball.csv")
+    benchBatch()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = makeSynthetic(os.path.join(tmp, "synthetic.csv"), scale)
+        benchRecords(synthetic, repeat=3)
+        benchCache(synthetic, repeat=3)
+        benchSchema(synthetic, repeat=3)
+        benchChunked(synthetic)
+        benchLazy(synthetic, repeat=3)
+        benchLeaderboard(synthetic)
+        benchQueries(synthetic)
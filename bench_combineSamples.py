@@ -0,0 +1,141 @@
+"""
+Benchmarks for combineSamples.
+
+Run with:  python bench_combineSamples.py [files]
+where files is the number of generated sample files (default 20,000).
+"""
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import combineSamples as module
+from combineSamples import combineSamples, combineSamplesStream
+
+
+def makeSamples(path, files, seed=0, start=1):
+    """
+    Writes `files` one-row boiler_sample_NNNNN.csv files in the format of the sample data, numbered from start.
+    """
+    rng = np.random.default_rng(seed)
+    header = '"","t1","t2","t3","t4","t5","t6","t7","t8"\n'
+    for i, row in enumerate(rng.integers(450, 550, size=(files, 8)), start=start):
+        with open(os.path.join(path, f"boiler_sample_{i:05d}.csv"), 'w') as f:
+            f.write(header + f'"{i}",' + ",".join(map(str, row)) + "\n")
+
+
+def benchWorkers(files=20000, workers=(None, 8, 32), latency=(0, 0.002)):
+    """
+    Times combineSamples over a generated directory with serial and concurrent reads.
+
+    Local disks answer in microseconds, so a second run adds `latency` seconds of waiting per file (as on
+    network-mounted storage) by wrapping the file reader.
+    """
+    read = module._readSample
+
+    def slowRead(filename):
+        time.sleep(delay)
+        return read(filename)
+
+    with tempfile.TemporaryDirectory() as path:
+        makeSamples(path, files)
+        print(f"{files:,d} files, {os.cpu_count()} CPUs")
+        for delay in latency:
+            module._readSample = slowRead if delay else read
+            try:
+                for count in workers:
+                    start = time.perf_counter()
+                    combineSamples("boiler_sample_*.csv", path, workers=count)
+                    elapsed = time.perf_counter() - start
+                    print(f"  latency {delay * 1000:3.0f} ms  workers={str(count):5s} {elapsed:8.2f} s   "
+                          f"{files / elapsed:10,.0f} files/s")
+            finally:
+                module._readSample = read
+
+
+def benchFast(files=20000):
+    """
+    Compares files per second of the per-file reader and the fixed-format block loader.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        makeSamples(path, files)
+        print(f"{files:,d} files")
+        for name, fast in [("per-file read_csv", False), ("fixed-format block", True)]:
+            start = time.perf_counter()
+            combineSamples("boiler_sample_*.csv", path, fast=fast)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:20s} {elapsed:8.2f} s   {files / elapsed:10,.0f} files/s")
+
+
+def benchCache(files=50000, new=100):
+    """
+    Times a cold and a warm cached run, a run after `new` files arrive and one after `new` files change.
+    """
+    with tempfile.TemporaryDirectory() as path, tempfile.TemporaryDirectory() as cache_dir:
+        makeSamples(path, files)
+        print(f"{files:,d} files")
+        for name, fast in [("per-file read_csv", False), ("fixed-format block", True)]:
+            cache = os.path.join(cache_dir, name)
+            for run, folder in [("uncached", None), ("cold", cache), ("warm", cache)]:
+                start = time.perf_counter()
+                combineSamples("boiler_sample_*.csv", path, fast=fast, cache_dir=folder)
+                print(f"  {name:20s} {run:10s} {time.perf_counter() - start:8.2f} s")
+
+        makeSamples(path, new, start=files + 1)
+        start = time.perf_counter()
+        combineSamples("boiler_sample_*.csv", path, fast=True, cache_dir=cache)
+        print(f"  {'fixed-format block':20s} {f'+{new} files':10s} {time.perf_counter() - start:8.2f} s")
+
+        makeSamples(path, new, seed=1)
+        start = time.perf_counter()
+        combineSamples("boiler_sample_*.csv", path, fast=True, cache_dir=cache)
+        print(f"  {'fixed-format block':20s} {f'{new} edited':10s} {time.perf_counter() - start:8.2f} s")
+
+
+def benchStore(files=20000):
+    """
+    Compares the bytes sent to a worker process for the control and test frames against a SampleStore.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        makeSamples(path, files)
+        result = combineSamples("boiler_sample_*.csv", path, fast=True, store=os.path.join(path, "samples.npy"))
+
+        frames = len(pickle.dumps((result['control'], result['test'])))
+        store = len(pickle.dumps(result['store']))
+        print(f"{files:,d} rows: pickled control+test frames {frames:,d} bytes, pickled store {store:,d} bytes")
+
+
+def benchStream(sizes=(10000, 20000, 40000), batch_files=1000):
+    """
+    Compares peak traced memory of combineSamples and of consuming combineSamplesStream, as the number of
+    files grows.
+    """
+    def consume():
+        for kind, batch in combineSamplesStream("boiler_sample_*.csv", path, batch_files=batch_files, fast=True):
+            batch.sum()
+
+    for files in sizes:
+        with tempfile.TemporaryDirectory() as path:
+            makeSamples(path, files)
+            runs = [("combineSamples", lambda: combineSamples("boiler_sample_*.csv", path, fast=True)),
+                    ("stream", consume)]
+            for name, run in runs:
+                tracemalloc.start()
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{files:8,d} files  {name:15s} {elapsed:6.2f} s   peak {peak / 2 ** 20:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    benchWorkers(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
+    benchFast(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
+    benchCache()
+    benchStore()
+    benchStream()
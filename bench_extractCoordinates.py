@@ -0,0 +1,56 @@
+"""
+Benchmarks for extractCoordinates.
+
+Run with:  python bench_extractCoordinates.py [rows]
+where rows is the largest number of generated coordinate rows (default 1,000,000).
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from extractCoordinates import extractCoordinates
+
+
+def makeCoordinates(rows, invalid=0.0, seed=0):
+    """
+    Builds a station/coordinates DataFrame in the format of coordinates.csv, with a fraction of the rows in other
+    formats (missing, integers or free text) that the regex has to handle.
+    """
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(-90, 90, rows).round(6)
+    lon = rng.uniform(-180, 180, rows).round(4)
+    coordinates = [f"({a}, {b})" for a, b in zip(lat, lon)]
+    for i in np.flatnonzero(rng.random(rows) < invalid):
+        coordinates[i] = ["", "(12, 34)", f"near {lat[i]}, {lon[i]}", None][i % 4]
+    return pd.DataFrame({'station': np.arange(1, rows + 1), 'coordinates': coordinates})
+
+
+def benchThroughput(sizes=(10000, 100000, 1000000), invalid=(0.0, 0.1), repeat=3):
+    """
+    Prints rows/sec of the regex path and the vectorized parser, checking they give the same frame.
+    """
+    print("extractCoordinates throughput")
+    for rows in sizes:
+        for fraction in invalid:
+            dat = makeCoordinates(rows, fraction)
+            times = {}
+            for fast in (False, True):
+                best = np.inf
+                for _ in range(repeat):
+                    frame = dat.copy()
+                    start = time.perf_counter()
+                    result = extractCoordinates(frame, fast=fast)
+                    best = min(best, time.perf_counter() - start)
+                times[fast] = (best, result)
+
+            (slow, exp), (fast, act) = times[False], times[True]
+            assert exp.equals(act)
+            print(f"  {rows:>11,} rows {fraction:4.0%} other   regex {rows / slow:>13,.0f} rows/s   "
+                  f"parser {rows / fast:>13,.0f} rows/s ({slow / fast:.0f}x)")
+
+
+if __name__ == "__main__":
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    benchThroughput(tuple(n for n in (10000, 100000, 1000000, 10000000) if n <= largest))
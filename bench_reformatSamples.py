@@ -0,0 +1,141 @@
+"""
+Benchmarks for reformatSamples.
+
+Run with:  python bench_reformatSamples.py [max_rows]
+where max_rows is the largest input in the scaling run (default 100,000,000).
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from reformatSamples import reformatSamples, reformatRagged, reformatArrays, reformatStream
+
+
+def makeRings(rows, n_obs=5, shuffle=False, seed=0):
+    """
+    Generates `rows` piston ring measurements, n_obs per sample, in sample order unless shuffle is True.
+    """
+    rng = np.random.default_rng(seed)
+    sample = np.repeat(np.arange(1, rows // n_obs + 1), n_obs)
+    if shuffle:
+        sample = rng.permutation(sample)
+    return pd.DataFrame({"diameter": 74 + rng.normal(0, 0.01, len(sample)), "sample": sample})
+
+
+def pivotReformat(samples):
+    """
+    The general groupby/pivot path, which reformatSamples used for every input. Used as the benchmark baseline.
+    """
+    samples['trial'] = samples.groupby('sample').cumcount() + 1
+    if samples.groupby("sample").size().nunique() != 1:
+        return None
+    reshaped = samples.pivot(index="sample", columns="trial", values="diameter")
+    reshaped.columns = [f"obs.{i}" for i in reshaped.columns]
+    reshaped.reset_index(inplace=True)
+    reshaped.index = reshaped.index + 1
+    return reshaped
+
+
+def benchScaling(max_rows=10 ** 8, pivot_limit=10 ** 7):
+    """
+    Times reformatSamples on sorted and shuffled inputs from 1,000,000 rows up to max_rows, and the pivot path
+    up to pivot_limit rows.
+    """
+    print("reformatSamples scaling")
+    rows = 10 ** 6
+    while rows <= max_rows:
+        for shuffle in (False, True):
+            samples = makeRings(rows, shuffle=shuffle)
+            start = time.perf_counter()
+            reformatSamples(samples)
+            fast = time.perf_counter() - start
+
+            line = f"  {rows:13,d} rows {'shuffled' if shuffle else 'sorted  '}  reshape {fast * 1000:10.2f} ms"
+            if rows <= pivot_limit:
+                start = time.perf_counter()
+                pivotReformat(samples)
+                pivot = time.perf_counter() - start
+                line += f"   pivot {pivot * 1000:10.2f} ms ({pivot / fast:.0f}x)"
+            print(line)
+            del samples
+        rows *= 10
+
+
+def benchRagged(rows=10 ** 7, drop=0.01, seed=0):
+    """
+    Times the padded and CSR layouts on samples with a fraction of dropped readings, against the pivot that
+    a custom script needs (reformatSamples itself returns None for ragged samples).
+    """
+    samples = makeRings(rows)
+    keep = np.random.default_rng(seed).random(len(samples)) >= drop
+    samples = samples[keep].reset_index(drop=True)
+
+    print(f"{len(samples):,d} rows, {drop:.0%} of readings dropped")
+    for layout in ('padded', 'csr'):
+        start = time.perf_counter()
+        reformatRagged(samples, layout)
+        print(f"  {layout:8s} {(time.perf_counter() - start) * 1000:10.2f} ms")
+
+    start = time.perf_counter()
+    trial = samples.groupby('sample').cumcount() + 1
+    samples.assign(trial=trial).pivot(index="sample", columns="trial", values="diameter")
+    print(f"  {'pivot':8s} {(time.perf_counter() - start) * 1000:10.2f} ms")
+
+
+def benchMemory(rows=10 ** 7):
+    """
+    Compares peak traced memory (above the input) of the pivot path, reformatSamples and reformatArrays.
+    """
+    for shuffle in (False, True):
+        print(f"{rows:,d} rows {'shuffled' if shuffle else 'in sample order'}, "
+              f"output matrix {rows * 8 / 2 ** 20:.1f} MiB")
+        runs = [("pivot", lambda dat: pivotReformat(dat)),
+                ("reformatSamples", lambda dat: reformatSamples(dat)),
+                ("reformatArrays", lambda dat: reformatArrays(dat['sample'], dat['diameter']))]
+        for name, run in runs:
+            samples = makeRings(rows, shuffle=shuffle)
+            tracemalloc.start()
+            start = time.perf_counter()
+            run(samples)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {name:16s} {elapsed * 1000:10.2f} ms   peak {peak / 2 ** 20:8.1f} MiB")
+            del samples
+
+
+def benchStream(rows=2 * 10 ** 6, chunksize=100000):
+    """
+    Compares time and peak traced memory of reading a measurement file for reformatSamples against streaming
+    it through reformatStream (consuming each batch as it arrives).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "rings.csv")
+        makeRings(rows).to_csv(filename)
+
+        def stream():
+            for batch in reformatStream(filename, chunksize):
+                batch['obs.1'].sum()
+
+        print(f"{rows:,d} row file, {chunksize:,d} rows per chunk")
+        for name, run in [("in memory", lambda: reformatSamples(pd.read_csv(filename))), ("stream", stream)]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {name:10s} {elapsed * 1000:10.2f} ms   {rows / elapsed:12,.0f} rows/s   "
+                  f"peak {peak / 2 ** 20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    benchScaling(int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 8)
+    benchRagged()
+    benchMemory()
+    benchStream()
@@ -0,0 +1,51 @@
+"""
+Timing of the regression-test comparisons before and after vectorizing them.
+
+Run with:  python bench_testutils.py
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from bbanalyze import bbanalyze
+from testutils import compFloat, compSeries, compDataFrame
+
+
+def legacyCompSeries(exp, act):
+    """
+    The original float comparison: one compFloat call and two .loc lookups per row.
+    """
+    idx = pd.Series(exp.index)
+    return np.all(idx.apply(lambda i: compFloat(exp.loc[i], act.loc[i])))
+
+
+def legacyCellLoop(exp, act):
+    """
+    The original combineSamples check: one assertAlmostEqual-style comparison per cell.
+    """
+    for i in exp.index:
+        for j in exp.keys():
+            if round(abs(exp.loc[i, j] - act.loc[i, j]), 5) != 0:
+                return False
+    return True
+
+
+if __name__ == "__main__":
+    bb = bbanalyze()['bb']
+    copy = bb.copy()
+    floats = [col for col in bb.columns if bb[col].dtype == 'float']
+
+    before = timeit.timeit(lambda: [legacyCompSeries(bb[col], copy[col]) for col in floats], number=1)
+    after = timeit.timeit(lambda: [compSeries(bb[col], copy[col]) for col in floats], number=1)
+    print(f"bb float columns ({len(bb)} rows x {len(floats)} columns)")
+    print(f"  per-element apply: {before * 1000:9.2f} ms")
+    print(f"  vectorized:        {after * 1000:9.2f} ms  ({before / after:.0f}x)")
+
+    samples = pd.DataFrame(np.random.default_rng(0).integers(400, 600, (2000, 9)),
+                           columns=['sample'] + [f"t{i}" for i in range(1, 9)]).astype(float)
+    before = timeit.timeit(lambda: legacyCellLoop(samples, samples.copy()), number=1)
+    after = timeit.timeit(lambda: compDataFrame(samples, samples.copy()), number=1)
+    print(f"samples frame ({samples.shape[0]} rows x {samples.shape[1]} columns)")
+    print(f"  per-cell loop:     {before * 1000:9.2f} ms")
+    print(f"  vectorized:        {after * 1000:9.2f} ms  ({before / after:.0f}x)")
@@ -1,8 +1,288 @@
+import numpy as np
 import pandas as pd
 import glob
+import hashlib
+import itertools
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-def combineSamples (pattern, path='.', control_samples=None):
+COLUMNS = [f"t{i}" for i in range(1, 9)]
+HEADER = b'"",' + b",".join(f'"{col}"'.encode() for col in COLUMNS)
+
+def _readSample(filename):
+    """
+    Reads one sample file, naming its measurement columns t1..t8 and copying its first column into 'sample'.
+    """
+    # Read file, setting the first unnamed column as index
+    df = pd.read_csv(filename, index_col = 0)
+    df.columns = COLUMNS
+    df.insert(0, "sample", df.index)
+    return df
+
+
+def _readBody(filename):
+    """
+    Reads the rows of one sample file as bytes, or returns None if its header is not the fixed boiler header.
+    """
+    with open(filename, 'rb') as f:
+        if f.readline().rstrip(b'\r\n') != HEADER:
+            return None
+        body = f.read().replace(b'\r', b'')
+    return body if body.endswith(b'\n') or not body else body + b'\n'
+
+
+def _loadFixed(bodies):
+    """
+    Parses the rows of every file in the fixed boiler format (a quoted integer label and 8 integer measurements)
+    into one integer block and one label array, and builds the combined DataFrame once.
+
+    Returns:
+        pd.DataFrame or None: The same frame as concatenating _readSample for each file, or None if any file is
+                              not in the fixed format (missing values, decimals, rows of another width, a
+                              different header, ...).
+    """
+    if not bodies or not all(bodies):
+        return None
+
+    # every line must hold exactly one label and 8 measurements, or the fields would shift across rows
+    text = b"".join(bodies)
+    buf = np.frombuffer(text, dtype=np.uint8)
+    lines = np.flatnonzero(buf == ord('\n'))
+    commas = np.bincount(np.searchsorted(lines, np.flatnonzero(buf == ord(','))), minlength=len(lines))
+    if len(commas) != len(lines) or (commas != len(COLUMNS)).any():
+        return None
+    fields = np.array(text.replace(b'\n', b',').split(b',')[:-1]).reshape(-1, len(COLUMNS) + 1)
+
+    labels = np.char.strip(fields[:, 0], b'"')
+    try:
+        labels = labels.astype(np.int64)
+        block = fields[:, 1:].astype(np.int64)
+    except ValueError:
+        return None
+
+    samples = pd.DataFrame(block, index=labels, columns=COLUMNS)
+    samples.insert(0, "sample", labels)
+    return samples
+
+
+def _readFiles(read, files, workers):
+    """
+    Applies read to every file, one at a time or with `workers` threads, keeping the file order.
+    """
+    if workers is None:
+        return [read(file) for file in files]
+
+    # reading is mostly waiting on the file system, so threads overlap it; map keeps the file order
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read, files))
+
+
+def _parseFiles(files, workers, fast):
+    """
+    Reads and combines sample files.
+
+    Returns:
+        tuple: The combined DataFrame, the number of rows read from each file, and the dtypes (as strings, one
+               per column) each file was read with.
+    """
+    if fast:
+        bodies = _readFiles(_readBody, files, workers)
+        samples = _loadFixed(bodies)
+        if samples is not None:
+            return samples, [body.count(b'\n') for body in bodies], [_dtypeNames(samples)] * len(bodies)
+
+    frames = _readFiles(_readSample, files, workers)
+    return pd.concat(frames), [len(frame) for frame in frames], [_dtypeNames(frame) for frame in frames]
+
+
+def _dtypeNames(samples):
+    return [str(dtype) for dtype in samples.dtypes]
+
+
+def _concatDtypes(file_dtypes):
+    """
+    Returns the dtypes (as strings) pd.concat gives to the frames of files read with file_dtypes (one list per
+    file), using one single-row frame per distinct list.
+    """
+    kinds = {tuple(dtypes) for dtypes in file_dtypes}
+    frames = [pd.DataFrame({i: np.zeros(1, dtype=dtype) for i, dtype in enumerate(kind)}) for kind in kinds]
+    return _dtypeNames(pd.concat(frames))
+
+
+def _writeCache(cache_dir, samples, manifest):
+    """
+    Saves the combined rows and then the manifest, each replaced atomically. Rows with object columns are not
+    cached, since reading them back would mean unpickling a file from cache_dir; any older cache is removed.
+    """
+    if any(dtype == object for dtype in samples.dtypes):
+        for name in ("manifest.json", "samples.npz"):
+            if os.path.exists(os.path.join(cache_dir, name)):
+                os.remove(os.path.join(cache_dir, name))
+        return
+
+    tmp_file = os.path.join(cache_dir, "samples.tmp.npz")
+    np.savez(tmp_file, **{col: samples[col].to_numpy() for col in samples.columns})
+    os.replace(tmp_file, os.path.join(cache_dir, "samples.npz"))
+
+    tmp_file = os.path.join(cache_dir, "manifest.json.tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, os.path.join(cache_dir, "manifest.json"))
+
+
+def _readCache(cache_dir):
+    """
+    Returns:
+        tuple: The cached rows and the manifest, or (None, an empty manifest) if there is no usable cache.
+    """
+    empty = {"files": [], "rows": 0}
+    try:
+        with open(os.path.join(cache_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+        with np.load(os.path.join(cache_dir, "samples.npz"), allow_pickle=False) as data:
+            samples = pd.DataFrame({col: data[col] for col in data.files})
+    except (OSError, ValueError, KeyError):
+        return None, empty
+
+    if len(samples) != manifest["rows"] or any(len(entry) != 5 for entry in manifest["files"]):
+        # the rows and the manifest were written by different runs, or by an older version
+        return None, empty
+    samples.index = pd.Index(samples["sample"].to_numpy())
+    return samples, manifest
+
+
+def _cacheFolder(cache_dir, file_pattern):
+    """
+    Returns the folder of cache_dir that holds the cache of one path and pattern, so that combining other files
+    with the same cache_dir leaves it alone.
+    """
+    return os.path.join(cache_dir, hashlib.sha1(os.path.abspath(file_pattern).encode()).hexdigest()[:16])
+
+
+def _loadCached(files, cache_dir, workers, fast):
+    """
+    Combines sample files through a cache of the rows already read, stored in cache_dir.
+
+    The manifest lists each cached file's absolute path, size, modification time, row count and dtypes, in the
+    order its rows are stored. The rows of files that changed or disappeared are dropped, and only new or
+    changed files are read and appended. If the rows kept no longer have the dtypes reading every file would
+    give (a dropped file was the only one with decimals, say), every file is read again, so the result is always
+    the same as reading every file.
+
+    Returns:
+        pd.DataFrame: The combined rows, in the order of files.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    keys = [os.path.abspath(file) for file in files]
+    stats = {key: os.stat(key) for key in keys}
+
+    samples, manifest = _readCache(cache_dir)
+    entries = manifest["files"]
+    current = [key in stats and [size, mtime] == [stats[key].st_size, stats[key].st_mtime_ns]
+               for key, size, mtime, rows, dtypes in entries]
+    dropped = not all(current)
+    if dropped:
+        keep = np.repeat(current, [entry[3] for entry in entries])
+        entries = [entry for entry, ok in zip(entries, current) if ok]
+        samples = samples.iloc[np.flatnonzero(keep)] if entries else None
+        manifest = {"files": entries, "rows": int(keep.sum())}
+
+    cached = {entry[0] for entry in entries}
+    new = [key for key in keys if key not in cached]
+    if new:
+        parsed, counts, dtypes = _parseFiles(new, workers, fast)
+        samples = parsed if samples is None else pd.concat([samples, parsed])
+        manifest["files"] += [[key, stats[key].st_size, stats[key].st_mtime_ns, rows, file_dtypes]
+                              for key, rows, file_dtypes in zip(new, counts, dtypes)]
+
+    if new or dropped:
+        if _dtypeNames(samples) != _concatDtypes(entry[4] for entry in manifest["files"]):
+            # the rows kept were read with dtypes only the dropped files needed
+            samples, counts, dtypes = _parseFiles(keys, workers, fast)
+            manifest["files"] = [[key, stats[key].st_size, stats[key].st_mtime_ns, rows, file_dtypes]
+                                 for key, rows, file_dtypes in zip(keys, counts, dtypes)]
+        manifest["rows"] = len(samples)
+        _writeCache(cache_dir, samples, manifest)
+
+    # put each file's rows back in the order of files
+    stored = {entry[0]: i for i, entry in enumerate(manifest["files"])}
+    counts = np.array([entry[3] for entry in manifest["files"]], dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    slots = np.array([stored[key] for key in keys], dtype=np.int64)
+    lengths = counts[slots]
+    positions = np.repeat(starts[slots] - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + \
+        np.arange(lengths.sum())
+    if len(positions) == len(samples) and np.array_equal(positions, np.arange(len(samples))):
+        return samples
+    return samples.iloc[positions]
+
+
+class SampleStore:
+    """
+    The combined t1..t8 measurements saved as a memory-mapped .npy matrix, with the sample labels beside it.
+
+    control and test are views over row ranges of the mapped file, so they cost no copy, and pickling a store
+    only sends its filename: worker processes reopen the file and share the same pages of the OS page cache.
+    """
+
+    def __init__(self, filename, control_samples):
+        """
+        Args:
+            filename (str): Path of the measurement matrix written by SampleStore.write.
+            control_samples (int): Number of rows in the control dataset.
+        """
+        self.filename = filename
+        self.control_samples = control_samples
+        self.values = np.load(filename, mmap_mode='r')
+        self.sample = np.load(self._labelFile(filename), mmap_mode='r')
+
+    @staticmethod
+    def _labelFile(filename):
+        return os.path.splitext(filename)[0] + ".sample.npy"
+
+    @classmethod
+    def write(cls, filename, samples, control_samples):
+        """
+        Saves the measurements and labels of a combined samples DataFrame and opens them as a store.
+        """
+        for target, values in [(filename, samples[COLUMNS].to_numpy()),
+                               (cls._labelFile(filename), samples["sample"].to_numpy())]:
+            tmp_file = target + ".tmp.npy"
+            np.save(tmp_file, np.ascontiguousarray(values))
+            os.replace(tmp_file, target)
+        return cls(filename, control_samples)
+
+    def __reduce__(self):
+        return (type(self), (self.filename, self.control_samples))
+
+    @property
+    def control(self):
+        """
+        np.memmap: The control rows of the measurement matrix, without copying them.
+        """
+        return self.values[:self.control_samples]
+
+    @property
+    def test(self):
+        """
+        np.memmap: The test rows of the measurement matrix, without copying them.
+        """
+        return self.values[self.control_samples:]
+
+    def frame(self, rows=slice(None)):
+        """
+        Wraps a row range of the store in a DataFrame shaped like combineSamples' 'samples'. The measurement
+        columns share memory with the mapped file.
+        """
+        samples = pd.DataFrame(self.values[rows], columns=COLUMNS, index=np.asarray(self.sample[rows]),
+                               copy=False)
+        samples.insert(0, "sample", samples.index)
+        return samples
+
+
+def combineSamples (pattern, path='.', control_samples=None, workers=None, fast=False, cache_dir=None,
+                    store=None):
     """
     Combines samples from files matching the given pattern into a single DataFrame.
 
@@ -11,6 +291,16 @@ def combineSamples (pattern, path='.', control_samples=None):
         path (str): Directory path to search for files. Defaults to current directory.
         control_samples (int or None): Number of samples in the control dataset.
                                        Defaults to 60% of total samples.
+        workers (int or None): Number of threads reading files concurrently. Defaults to reading them one at
+                               a time. The files are combined in the same order either way.
+        fast (bool): Parse every file in the fixed boiler format into one NumPy block and build a single
+                     DataFrame, instead of one DataFrame per file. Falls back to the per-file reader if any
+                     file is not in that format; the result is the same either way.
+        cache_dir (str or None): Folder for a manifest and cache of the files already read, kept apart for
+                                 each path and pattern. Only new or changed files are read on later calls.
+                                 Rows with text (object) columns are not cached. Defaults to None (no caching).
+        store (str or None): Also save the t1..t8 measurements to this .npy file and return them as a
+                             memory-mapped SampleStore under the 'store' key. Defaults to None.
 
     Returns:
         dict: A dictionary containing metadata and resulting DataFrames.
@@ -20,15 +310,10 @@ def combineSamples (pattern, path='.', control_samples=None):
     files = glob.glob(file_pattern)
     matching_files = [os.path.basename(f) for f in files]
 
-    sample_list = []
-    for file in matching_files:
-        # Read file, setting the first unnamed column as index
-        df = pd.read_csv(file, index_col = 0)
-        df.columns = [f"t{i}" for i in range(1, 9)]
-        df.insert(0, "sample", df.index)
-        sample_list.append(df)
-
-    samples = pd.concat(sample_list)
+    if cache_dir is not None and files:
+        samples = _loadCached(files, _cacheFolder(cache_dir, file_pattern), workers, fast)
+    else:
+        samples = _parseFiles(files, workers, fast)[0]
 
     # Set control_samples to 60% if None
     total_samples = len(samples)
@@ -49,11 +334,73 @@ def combineSamples (pattern, path='.', control_samples=None):
         "control": control,
         "test": test,
     }
+    if store is not None:
+        result["store"] = SampleStore.write(store, samples, control_samples)
 
     return result
 
 
 
+def _countRows(filename):
+    """
+    Counts the non-blank lines after the header of a sample file, without parsing them.
+    """
+    with open(filename, 'rb') as f:
+        f.readline()
+        return sum(1 for line in f if line.strip())
+
+
+def _fileBatches(pattern, path, batch_files):
+    """
+    Yields the matching filenames in lists of at most batch_files, in the order of glob.glob, without listing
+    them all at once.
+    """
+    files = glob.iglob(os.path.join(path, pattern))
+    while True:
+        batch = list(itertools.islice(files, batch_files))
+        if not batch:
+            return
+        yield batch
+
+
+def combineSamplesStream(pattern, path='.', control_samples=None, batch_files=1000, workers=None, fast=False):
+    """
+    Combines samples like combineSamples, but yields the control rows and then the test rows in batches as
+    the files are read, so only one batch of files is in memory at a time.
+
+    When control_samples is None, a first pass counts the rows of every file (without parsing them) to find
+    the 60% split before any rows are read.
+
+    Args:
+        pattern (str): Pattern for matching filenames.
+        path (str): Directory path to search for files. Defaults to current directory.
+        control_samples (int or None): Number of samples in the control dataset.
+                                       Defaults to 60% of total samples.
+        batch_files (int): Number of files read per batch.
+        workers (int or None): Number of threads reading each batch of files (see combineSamples).
+        fast (bool): Use the fixed-format block loader (see combineSamples).
+
+    Yields:
+        tuple: ('control' or 'test', pd.DataFrame) pairs. Concatenating the frames of each kind gives
+               combineSamples' 'control' and 'test' rows, in order; each batch has the dtypes of its own files.
+    """
+    if control_samples is None:
+        total_samples = sum(sum(_readFiles(_countRows, files, workers))
+                            for files in _fileBatches(pattern, path, batch_files))
+        control_samples = int(total_samples * 0.6)
+
+    position = 0
+    for files in _fileBatches(pattern, path, batch_files):
+        samples = _parseFiles(files, workers, fast)[0]
+
+        split = min(max(control_samples - position, 0), len(samples))
+        position += len(samples)
+        if split:
+            yield "control", samples.iloc[:split]
+        if split < len(samples):
+            yield "test", samples.iloc[split:]
+
+
 if __name__ == "__main__":
     path = "."
     pattern = "boiler_sample"
@@ -1,11 +1,135 @@
+import io
+
+import numpy as np
 import pandas as pd
 
-def extractCoordinates(dat):
+COORDINATES = r'([+-]?\d+\.\d+),\s*([+-]?\d+\.\d+)'
+DIGIT, SIGN, DOT, COMMA, SPACE, OPEN, CLOSE, NEWLINE = (1 << bit for bit in range(8))
+
+
+def _extractRegex(text):
+    """
+    Extracts latitude and longitude with the general pattern: the first "lat, lon" pair anywhere in each string.
+
+    Returns:
+        pd.DataFrame: 'lat' and 'lon' columns, NaN where a string has no pair.
+    """
+    lat_lon = text.str.extract(COORDINATES)
+    lat_lon.columns = ['lat', 'lon']
+
+    # Convert to numeric
+    lat_lon['lat'] = pd.to_numeric(lat_lon['lat'])
+    lat_lon['lon'] = pd.to_numeric(lat_lon['lon'])
+    return lat_lon
+
+
+def _byteClasses():
+    # one bit per kind of byte the "(lat, lon)" format is made of; every other byte is 0
+    classes = np.zeros(256, dtype=np.uint8)
+    classes[ord('0'):ord('9') + 1] = DIGIT
+    for chars, flag in [('+-', SIGN), ('.', DOT), (',', COMMA), (' ', SPACE), ('(', OPEN), (')', CLOSE),
+                        ('\n', NEWLINE)]:
+        classes[[ord(char) for char in chars]] = flag
+    return classes
+
+
+BYTE_CLASSES = _byteClasses()
+
+
+def _canonicalRows(buf, starts, ends):
+    """
+    Finds the rows of a newline-separated byte buffer that are exactly "(lat, lon)" or "(lat,lon)", with both
+    numbers written as [+-]digits.digits, by checking every byte against its neighbours at once.
+    """
+    kind = BYTE_CLASSES[buf]
+    prev = np.r_[np.uint8(NEWLINE), kind[:-1]]
+    after = np.r_[kind[1:], np.uint8(NEWLINE)]
+
+    def before(flags):
+        return (after & flags) != 0
+
+    # each byte may only appear where the format allows it
+    ok = (kind & (DIGIT | NEWLINE)) != 0
+    ok |= (kind == OPEN) & (prev == NEWLINE) & before(DIGIT | SIGN)
+    ok |= (kind == CLOSE) & (prev == DIGIT) & (after == NEWLINE)
+    ok |= (kind == SIGN) & ((prev & (OPEN | COMMA | SPACE)) != 0) & (after == DIGIT)
+    ok |= (kind == DOT) & (prev == DIGIT) & (after == DIGIT)
+    ok |= (kind == COMMA) & (prev == DIGIT) & before(DIGIT | SIGN | SPACE)
+    ok |= (kind == SPACE) & (prev == COMMA) & before(DIGIT | SIGN)
+    valid = np.logical_and.reduceat(ok, starts)
+
+    # one comma between the brackets and one decimal point on either side of it
+    dot = kind == DOT
+    dots = np.cumsum(dot, dtype=np.int32)
+    commas = np.flatnonzero(kind == COMMA)
+    rows = np.searchsorted(starts, commas, side='right') - 1
+    valid &= (kind[starts] == OPEN) & (kind[ends - 1] == CLOSE)
+    valid &= np.bincount(rows, minlength=len(starts)) == 1
+    valid &= np.add.reduceat(dot, starts) == 2
+    valid[rows[dots[commas] - dots[starts[rows]] != 1]] = False
+    return valid
+
+
+def _parseCoordinates(text):
+    """
+    Decodes "(lat, lon)" strings into a preallocated pair of float64 arrays.
+
+    The strings are joined into one byte buffer, the rows in the canonical format are validated with vectorized
+    byte checks and parsed in bulk by the C CSV parser, which rounds exactly as pd.to_numeric does. Any other
+    row goes through the general regex, so every value (and every NaN) matches _extractRegex. If the C parser
+    rejects a number, every row goes through the regex, which then raises the same error as _extractRegex.
+
+    Arguments:
+        text (pd.Series): Coordinate strings.
+
+    Returns:
+        tuple: The latitude and longitude arrays.
+    """
+    lat = np.empty(len(text))
+    lon = np.empty(len(text))
+
+    buf = np.frombuffer(('\n'.join(text) + '\n').encode('utf-8', 'replace'), np.uint8)
+    ends = np.flatnonzero(buf == ord('\n'))
+    if len(ends) == len(text):
+        starts = np.r_[0, ends[:-1] + 1]
+        valid = _canonicalRows(buf, starts, ends)
+    else:
+        # a string with a line break of its own: the rows cannot be told apart
+        valid = np.zeros(len(text), dtype=bool)
+
+    if valid.any():
+        keep = np.repeat(valid, ends - starts + 1) & ((BYTE_CLASSES[buf] & (OPEN | CLOSE)) == 0)
+        try:
+            parsed = pd.read_csv(io.BytesIO(buf[keep].tobytes()), header=None, names=['lat', 'lon'],
+                                 dtype=np.float64, engine='c')
+        except ValueError:
+            # a number the CSV parser cannot convert (one that overflows float64): the regex path parses every
+            # row instead, so the result or the error is the one _extractRegex gives
+            valid[:] = False
+        else:
+            lat[valid] = parsed['lat'].to_numpy()
+            lon[valid] = parsed['lon'].to_numpy()
+
+    if not valid.all():
+        try:
+            other = _extractRegex(text[~valid])
+        except ValueError:
+            # a match pd.to_numeric cannot convert (non-ASCII digits): raise with its position in the whole column
+            _extractRegex(text)
+            raise
+        lat[~valid] = other['lat'].to_numpy(dtype=np.float64)
+        lon[~valid] = other['lon'].to_numpy(dtype=np.float64)
+    return lat, lon
+
+
+def extractCoordinates(dat, fast=True):
     """
     Extract latitude and longitude from a DataFrame with station and coordinates columns.
 
     Arguments:
         dat (pd.DataFrame): Input data containing 'station' and 'coordinates' columns.
+        fast (bool): Parse "(lat, lon)" strings with the vectorized parser (see _parseCoordinates); other
+                     strings, or all of them when False, are matched with the regex. The results are the same.
 
     Returns:
         pd.DataFrame or int: DataFrame with columns 'station', 'lat', and 'lon' or an error code:
@@ -21,12 +145,11 @@ def extractCoordinates(dat):
 
     # Extract latitude and longitude
     dat['coordinates'] = dat['coordinates'].astype(str)  # Ensure coordinates are strings
-    lat_lon = dat['coordinates'].str.extract(r'([+-]?\d+\.\d+),\s*([+-]?\d+\.\d+)')
-    lat_lon.columns = ['lat', 'lon']
-
-    # Convert to numeric
-    lat_lon['lat'] = pd.to_numeric(lat_lon['lat'])
-    lat_lon['lon'] = pd.to_numeric(lat_lon['lon'])
+    if fast and len(dat):
+        lat, lon = _parseCoordinates(dat['coordinates'])
+        lat_lon = pd.DataFrame({'lat': lat, 'lon': lon}, index=dat.index)
+    else:
+        lat_lon = _extractRegex(dat['coordinates'])
 
     return pd.DataFrame({
         'station': dat['station'],
@@ -40,4 +163,3 @@ if __name__ == "__main__":
     data = pd.read_csv(file_path)
     result = extractCoordinates(data)
     print(result)
-
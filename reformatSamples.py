@@ -1,16 +1,172 @@
+import itertools
+
+import numpy as np
 import pandas as pd
 
-def reformatSamples(samples):
+def _groupRows(sample):
+    """
+    Groups the rows by sample label in one stable sort.
+
+    Arguments:
+        sample (np.ndarray): Sample label of each row.
+
+    Returns:
+        tuple or None: The sorted sample labels, the number of observations of each, and the row order that
+                       groups the rows by sample (None if they already are), or None if a label is missing.
+    """
+    if sample.dtype.kind in 'iuf':
+        if sample.dtype.kind == 'f' and np.isnan(sample).any():
+            return None
+        # numbers are sorted directly; a stable sort keeps each sample's observations in their input order
+        order = None if (sample[1:] >= sample[:-1]).all() else np.argsort(sample, kind='stable')
+        ordered = sample if order is None else sample[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]]) if len(ordered) else np.zeros(0, int)
+        return ordered[starts], np.diff(np.r_[starts, len(ordered)]), order
+
+    codes, labels = pd.factorize(sample, sort=True)
+    if (codes < 0).any():
+        return None
+    order = None if (codes[1:] >= codes[:-1]).all() else np.argsort(codes, kind='stable')
+    return labels, np.bincount(codes, minlength=len(labels)), order
+
+
+def _equalShape(sample):
+    """
+    Finds how to reshape the rows when every sample has the same number of observations.
+
+    Returns:
+        tuple or None: The _groupRows result with the single number of observations per sample in place of the
+                       counts, or None if a label is missing, there are no rows or the counts differ.
+    """
+    groups = _groupRows(sample) if len(sample) else None
+    if groups is None:
+        return None
+
+    labels, counts, order = groups
+    if (counts != counts[0]).any():
+        return None
+    return labels, counts[0], order
+
+
+def _reshape(labels, n_obs, order, diameters):
+    """
+    Builds the reformatted DataFrame of equal-sized samples in a newly allocated matrix, without copying it
+    again and without writing to diameters.
+    """
+    matrix = np.empty((len(labels), n_obs), dtype=diameters.dtype)
+    if order is None:
+        np.copyto(matrix.reshape(-1), diameters)
+    else:
+        np.take(diameters, order, out=matrix.reshape(-1))
+
+    reshaped = pd.DataFrame(matrix, columns=[f"obs.{i}" for i in range(1, n_obs + 1)],
+                            index=pd.RangeIndex(1, len(labels) + 1), copy=False)
+    reshaped.insert(0, "sample", labels)
+    return reshaped
+
+
+def reformatArrays(sample, diameter):
+    """
+    Restructures samples like reformatSamples, from the sample and diameter columns alone.
+
+    Nothing is written to the inputs and no column of them is copied: the only large allocations are the
+    output matrix and, when the rows are not already in sample order, the sort order.
+
+    Arguments:
+        sample (array-like): Sample label of each observation, for example samples['sample'].
+        diameter (array-like): Diameter of each observation, for example samples['diameter'].
+
+    Returns:
+        pd.DataFrame or None: The same data as reformatSamples, or None if a label is missing or samples have
+                              inconsistent observations.
+    """
+    shape = _equalShape(np.asarray(sample))
+    if shape is None:
+        return None
+    return _reshape(*shape, np.asarray(diameter))
+
+
+def reformatRagged(samples, layout='padded', max_width=None):
+    """
+    Restructures samples that may have different numbers of observations, in one vectorized pass.
+
+    Rows without a sample label are ignored, as the groupby in reformatSamples ignores them.
+
+    Arguments:
+        samples (pd.DataFrame): Input data with sample observations (not modified).
+        layout (str): 'padded' for a reformatSamples-style DataFrame padded with NaN, or 'csr' for the
+                      observations of every sample stored back to back with their offsets.
+        max_width (int or None): Number of obs columns of the padded layout; later observations of a sample
+                                 are dropped. Defaults to the largest number of observations.
+
+    Returns:
+        dict: 'sample' (sorted labels) and 'counts' (observations per sample) for both layouts, plus
+              'reformatted' (DataFrame with sample and obs.1..obs.W columns) for 'padded', or 'offsets' and
+              'values' for 'csr', where sample i's observations are values[offsets[i]:offsets[i + 1]].
+    """
+    if layout not in ('padded', 'csr'):
+        raise ValueError(f"layout must be 'padded' or 'csr', got {layout!r}")
+
+    sample = samples['sample'].to_numpy()
+    diameters = samples['diameter'].to_numpy()
+    labelled = pd.notna(sample)
+    if not labelled.all():
+        sample, diameters = sample[labelled], diameters[labelled]
+
+    labels, counts, order = _groupRows(sample)
+    values = diameters if order is None else diameters[order]
+    offsets = np.r_[0, np.cumsum(counts)]
+    result = {"sample": labels, "counts": counts}
+
+    if layout == 'csr':
+        result.update(offsets=offsets, values=values)
+        return result
+
+    # position of each observation within its sample, then scatter into the padded matrix
+    width = int(counts.max(initial=0)) if max_width is None else max_width
+    rank = np.arange(len(values)) - np.repeat(offsets[:-1], counts)
+    row = np.repeat(np.arange(len(labels)), counts)
+    keep = rank < width
+    matrix = np.full((len(labels), width), np.nan)
+    matrix[row[keep], rank[keep]] = values[keep]
+
+    reformatted = pd.DataFrame(matrix, columns=[f"obs.{i}" for i in range(1, width + 1)])
+    reformatted.insert(0, "sample", labels)
+    reformatted.index = reformatted.index + 1
+    result["reformatted"] = reformatted
+    return result
+
+
+def reformatSamples(samples, ragged=False, max_width=None):
     """
     Restructures the input data so that all observations for a sample are in a single row.
 
+    When every sample has the same number of observations, the diameters are sorted by sample once and
+    reshaped into the (samples x observations) matrix directly; otherwise the general pivot is used.
+
     Arguments:
         samples (pd.DataFrame): Input data with sample observations.
+        ragged (bool): Pad samples with fewer observations with NaN (see reformatRagged) instead of returning
+                       None. samples is then left unchanged.
+        max_width (int or None): Number of obs columns when ragged is True. Defaults to the largest number of
+                                 observations.
 
     Returns:
         pd.DataFrame or None: Restructured data or None if samples have inconsistent observations.
     """
 
+    if ragged:
+        return reformatRagged(samples, 'padded', max_width)['reformatted']
+
+    shape = _equalShape(samples['sample'].to_numpy())
+    if shape is not None:
+        labels, n_obs, order = shape
+        trials = np.tile(np.arange(1, n_obs + 1), len(labels))
+        if order is not None:
+            trials[order] = trials.copy()
+        samples['trial'] = trials
+        return _reshape(labels, n_obs, order, samples['diameter'].to_numpy())
+
     samples['trial'] = samples.groupby('sample').cumcount() + 1
 
     # Ensure all samples have the same number of trials
@@ -31,7 +187,130 @@ def reformatSamples(samples):
     return reshaped
 
 
+def _chunks(source, chunksize):
+    """
+    Turns a streaming source into (sample, diameter) array pairs of at most chunksize rows each.
+    """
+    if isinstance(source, str):
+        source = pd.read_csv(source, usecols=['sample', 'diameter'], chunksize=chunksize)
+
+    iterator = iter(source)
+    for first in iterator:
+        if isinstance(first, pd.DataFrame):
+            # a chunked CSV reader or any iterable of DataFrames
+            for chunk in itertools.chain([first], iterator):
+                yield chunk['sample'].to_numpy(), chunk['diameter'].to_numpy()
+            return
+
+        # an iterable of (sample, diameter) rows
+        iterator = itertools.chain([first], iterator)
+        while True:
+            rows = list(itertools.islice(iterator, chunksize))
+            if not rows:
+                return
+            sample, diameter = zip(*rows)
+            yield np.asarray(sample), np.asarray(diameter)
+
+
+def _wideRows(labels, matrix, start):
+    """
+    Builds a batch of reformatted rows, numbered from start + 1 like the rows of reformatSamples.
+    """
+    reshaped = pd.DataFrame(matrix, columns=[f"obs.{i}" for i in range(1, matrix.shape[1] + 1)],
+                            index=pd.RangeIndex(start + 1, start + len(labels) + 1))
+    reshaped.insert(0, "sample", labels)
+    return reshaped
+
+
+def reformatStream(source, chunksize=100000):
+    """
+    Restructures a stream of observations that is already ordered by sample, yielding the reformatted rows of
+    each chunk's completed samples as soon as the next sample starts.
+
+    Only the observations of the sample still open are carried from one chunk to the next. Concatenating the
+    batches gives the same DataFrame as reformatSamples on the whole stream.
+
+    Arguments:
+        source (str or iterable): Path to a CSV file with 'sample' and 'diameter' columns, a chunked CSV reader
+                                  (pd.read_csv(..., chunksize=n)), an iterable of DataFrames, or an iterable
+                                  of (sample, diameter) rows.
+        chunksize (int): Rows per chunk when reading a file or grouping single rows.
+
+    Yields:
+        pd.DataFrame: Batches of reformatted rows (sample, obs.1..obs.N).
+
+    Raises:
+        ValueError: As soon as a sample is missing its label, appears out of order (or again after it closed),
+                    closes with a different number of observations than the first sample, or already has more
+                    observations than the first sample while it is still open.
+    """
+    n_obs = None
+    last = None
+    emitted = 0
+    open_sample = open_diameter = np.zeros(0)
+
+    for sample, diameter in _chunks(source, chunksize):
+        if len(sample) == 0:
+            continue
+        sample = np.concatenate([open_sample, sample]) if len(open_sample) else sample
+        diameter = np.concatenate([open_diameter, diameter]) if len(open_diameter) else diameter
+
+        # find the first problem; the rows before it are consistent
+        stop, error = len(sample), None
+        missing = np.flatnonzero(pd.isna(sample))
+        if len(missing):
+            stop = missing[0]
+            error = f"missing sample label after sample {_label(sample[stop - 1] if stop else last)!r}"
+
+        starts = np.flatnonzero(np.r_[True, sample[1:stop] != sample[:stop - 1]]) if stop else np.zeros(0, int)
+        labels = sample[starts]
+
+        # each sample must come after every sample before it
+        unordered = np.flatnonzero(~(labels[1:] > labels[:-1]))
+        if len(labels) and last is not None and not labels[0] > last:
+            stop, error = 0, f"sample {_label(labels[0])!r} is out of order after sample {_label(last)!r}"
+        elif len(unordered):
+            i = unordered[0]
+            stop = starts[i + 1]
+            error = f"sample {_label(labels[i + 1])!r} is out of order after sample {_label(labels[i])!r}"
+
+        # samples that closed before the problem (without one, the last sample may continue in the next chunk)
+        closed = np.searchsorted(starts, stop, side='right') - 1 if error else len(starts) - 1
+        counts = np.diff(starts[:closed + 1])
+        if len(counts):
+            n_obs = counts[0] if n_obs is None else n_obs
+            inconsistent = np.flatnonzero(counts != n_obs)
+            if len(inconsistent):
+                closed = inconsistent[0]
+                error = f"sample {_label(labels[closed])!r} has {counts[closed]} observations, expected {n_obs}"
+        if not error and n_obs is not None and len(sample) - starts[-1] > n_obs:
+            # the open sample already has too many observations: raise now rather than carry it on
+            error = f"sample {_label(labels[-1])!r} has more than {n_obs} observations"
+
+        if closed > 0:
+            end = starts[closed]
+            yield _wideRows(labels[:closed], diameter[:end].reshape(-1, n_obs), emitted)
+            emitted += closed
+            last = labels[closed - 1]
+        if error:
+            raise ValueError(error)
+
+        open_sample, open_diameter = sample[starts[-1]:], diameter[starts[-1]:]
+
+    if len(open_sample):
+        n_obs = len(open_sample) if n_obs is None else n_obs
+        if len(open_sample) != n_obs:
+            raise ValueError(f"sample {_label(open_sample[0])!r} has {len(open_sample)} observations, "
+                             f"expected {n_obs}")
+        yield _wideRows(open_sample[:1], open_diameter.reshape(1, n_obs), emitted)
+
+
+def _label(value):
+    # NumPy scalars as plain Python values, for error messages
+    return value.item() if isinstance(value, np.generic) else value
+
+
 if __name__ == "__main__":
     samples = pd.read_csv('pistonrings.csv')
     reshaped_samples = reformatSamples(samples)
-    print(reshaped_samples)
\ No newline at end of file
+    print(reshaped_samples)
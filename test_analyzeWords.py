@@ -5,8 +5,10 @@ import shelve
 import pandas as pd
 import glob
 import os
+import shutil
+import tempfile
 
-from analyzeWords import analyzeWords
+from analyzeWords import WordMetrics, analyzeWords, analyzeWordsStream, analyzeWordsParallel
 
 class Test_analyzeWords(TestCase):
     def setUp(self):
@@ -56,6 +58,188 @@ class Test_analyzeWords(TestCase):
 
         self.assertTrue(self.exp['words_6plus'].equals(self.act['words_6plus']))
 
+    def test_histograms(self):
+        # the histograms are arrays indexed by letter and by length, converted to the dicts only in result()
+        metrics = WordMetrics()
+        metrics.update(self.words)
+
+        self.assertEqual(list(self.exp['letter_counts'].values()), metrics.letter_hist.tolist())
+        for size, count in self.exp['size_counts'].items():
+            self.assertEqual(count, metrics.size_hist[size])
+        self.assertEqual(sum(self.exp['size_counts'].values()), metrics.size_hist.sum())
+        self.assertEqual(self.exp['max_char'], metrics.max_char)
+
+
+class Test_analyzeWordsStream(TestCase):
+    def setUp(self):
+        # setup for all tests
+        with shelve.open('expected_results') as expected_results:
+            self.exp = expected_results['analyzeWords']
+
+    def assertCountsEqual(self, act):
+        for k in ['letter_counts', 'max_char', 'size_counts', 'oo_count', 'words_6plus_count']:
+            with self.subTest(metric=k):
+                self.assertEqual(self.exp[k], act[k])
+
+    def test_sources(self):
+        # a file path, a chunked reader and an iterator of words should all match the expected results
+        sources = {
+            'path': lambda: analyzeWordsStream("words.csv", chunksize=97),
+            'reader': lambda: analyzeWordsStream(pd.read_csv("words.csv", chunksize=200)),
+            'iterator': lambda: analyzeWordsStream(iter(pd.read_csv("words.csv")['x'].tolist()), chunksize=50),
+        }
+        for name, run in sources.items():
+            with self.subTest(source=name):
+                act = run()
+                self.assertCountsEqual(act)
+                self.assertTrue(self.exp['oo_words'].equals(act['oo_words']))
+                self.assertTrue(self.exp['words_6plus'].equals(act['words_6plus']))
+
+    def test_numeric_chunk(self):
+        # a chunk with only numeric-looking words is read as numbers, but analyzed as the words of the file
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        filename = os.path.join(path, "words.csv")
+        with open(filename, 'w') as f:
+            f.write("x\n123\n456\nfoo\nbooks\n7\n8.5\nbamboo\n")
+
+        exp = analyzeWords(pd.read_csv(filename)['x'])
+        sources = {
+            'reader': lambda: pd.read_csv(filename, chunksize=2),
+            'frames': lambda: list(pd.read_csv(filename, chunksize=3)),
+        }
+        for name, source in sources.items():
+            with self.subTest(source=name):
+                act = analyzeWordsStream(source())
+                for k in ['letter_counts', 'max_char', 'size_counts', 'oo_count', 'words_6plus_count']:
+                    self.assertEqual(exp[k], act[k])
+                self.assertTrue(exp['oo_words'].equals(act['oo_words']))
+                self.assertTrue(exp['words_6plus'].equals(act['words_6plus']))
+
+    def test_spill(self):
+        # spilled words are read back lazily from the spill folder
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+
+        act = analyzeWordsStream("words.csv", chunksize=100, spill_dir=spill_dir)
+
+        self.assertCountsEqual(act)
+        self.assertEqual(list(self.exp['oo_words']), list(act['oo_words']))
+        self.assertEqual(list(self.exp['words_6plus']), list(act['words_6plus']))
+        self.assertEqual(self.exp['oo_count'], len(act['oo_words']))
+
+    def test_spill_line_breaks(self):
+        # words with line breaks (or quotes and backslashes) come back from the spill files as they went in
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+        words = pd.Series(["foo\nbar", "school", "zoo\r\nkeeper", 'a"b\\oo', '"zoo"', "moo\u2028n"], name='x')
+
+        exp = analyzeWordsStream([words])
+        act = analyzeWordsStream([words], spill_dir=spill_dir)
+
+        for k in ['oo_words', 'words_6plus']:
+            with self.subTest(words=k):
+                self.assertEqual(list(exp[k]), list(act[k]))
+                self.assertEqual(len(exp[k]), len(act[k]))
+
+    def test_counts_only(self):
+        act = analyzeWordsStream("words.csv", keep_words=False)
+
+        self.assertCountsEqual(act)
+        self.assertIsNone(act['oo_words'])
+        self.assertIsNone(act['words_6plus'])
+
+
+class Test_analyzeWordsParallel(TestCase):
+    def setUp(self):
+        # setup for all tests
+        self.words = pd.read_csv("words.csv")['x']
+        self.exp = analyzeWords(self.words)
+
+    def assertResultEqual(self, act):
+        for k in ['letter_counts', 'max_char', 'size_counts', 'oo_count', 'words_6plus_count']:
+            with self.subTest(metric=k):
+                self.assertEqual(self.exp[k], act[k])
+        # sizes are keyed in the order they first appear, so the shard order must be kept
+        self.assertEqual(list(self.exp['size_counts']), list(act['size_counts']))
+        self.assertTrue(self.exp['oo_words'].equals(act['oo_words']))
+        self.assertTrue(self.exp['words_6plus'].equals(act['words_6plus']))
+
+    def test_merge(self):
+        # merging the metrics of consecutive shards gives the metrics of the whole Series
+        metrics = WordMetrics()
+        for start in range(0, len(self.words), 150):
+            shard = WordMetrics()
+            shard.update(self.words[start:start + 150])
+            metrics.merge(shard)
+
+        self.assertResultEqual(metrics.result())
+
+    def test_parallel(self):
+        sources = {
+            'path': lambda: analyzeWordsParallel("words.csv", workers=3, chunksize=64),
+            'iterator': lambda: analyzeWordsParallel(iter(self.words.tolist()), workers=2, chunksize=100),
+        }
+        for name, run in sources.items():
+            with self.subTest(source=name):
+                self.assertResultEqual(run())
+
+    def test_parallel_spill(self):
+        spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spill_dir)
+
+        act = analyzeWordsParallel("words.csv", workers=2, chunksize=100, spill_dir=spill_dir)
+
+        self.assertEqual(list(self.exp['oo_words']), list(act['oo_words']))
+        self.assertEqual(list(self.exp['words_6plus']), list(act['words_6plus']))
+        self.assertEqual(['oo_words.txt', 'words_6plus.txt'], sorted(os.listdir(spill_dir)))
+
+
+class Test_analyzeWordsPatterns(TestCase):
+    def setUp(self):
+        # setup for all tests
+        self.words = pd.read_csv("words.csv")['x']
+        self.patterns = ['oo', 'ee', 'tion', 'qu']
+        self.thresholds = [3, 6, 10]
+
+    def assertPatternsMatch(self, act):
+        for pattern in self.patterns:
+            with self.subTest(pattern=pattern):
+                exp = self.words[self.words.str.contains(pattern, regex=False)]
+                self.assertEqual(len(exp), act['pattern_counts'][pattern])
+                self.assertTrue(exp.equals(act['pattern_words'][pattern]))
+        for threshold in self.thresholds:
+            with self.subTest(threshold=threshold):
+                exp = self.words[self.words.str.len() >= threshold].str.lower()
+                self.assertEqual(len(exp), act['length_counts'][threshold])
+                self.assertTrue(exp.equals(act['length_words'][threshold]))
+
+    def test_patterns(self):
+        act = analyzeWords(self.words, self.patterns, self.thresholds)
+
+        self.assertPatternsMatch(act)
+        self.assertTrue(act['oo_words'].equals(act['pattern_words']['oo']))
+
+    def test_default_keys(self):
+        # without patterns or thresholds the result keeps its original keys
+        self.assertNotIn('pattern_counts', analyzeWords(self.words))
+        self.assertNotIn('length_counts', analyzeWords(self.words))
+
+    def test_nul_characters(self):
+        # words that are equal only up to a NUL character are still different words
+        self.words = pd.Series(['a', 'a\x00boo', 'abook', 'a\x00'], name='x')
+        act = analyzeWords(self.words, self.patterns, self.thresholds)
+
+        self.assertPatternsMatch(act)
+        self.assertEqual({1: 1, 5: 2, 2: 1}, act['size_counts'])
+        self.assertEqual(['a\x00boo', 'abook'], list(act['oo_words']))
+
+    def test_stream_parallel(self):
+        self.assertPatternsMatch(analyzeWordsStream("words.csv", chunksize=77, patterns=self.patterns,
+                                                    thresholds=self.thresholds))
+        self.assertPatternsMatch(analyzeWordsParallel("words.csv", workers=2, chunksize=64, patterns=self.patterns,
+                                                      thresholds=self.thresholds))
+
 
 if __name__ == '__main__':
     rslt = main(verbosity=2, exit=False)
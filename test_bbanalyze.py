@@ -1,117 +1,18 @@
 from unittest import TestCase
 from unittest import main
+from unittest import mock
 
 import shelve
-from bbanalyze import bbanalyze
+import shutil
+import tempfile
+import os
+from bbanalyze import bbanalyze, loadBaseball, BattingAggregate, BattingAnalysis, computeRecords, recordStats
+from bbanalyze import BASEBALL_SCHEMA, STAT_COLUMNS, RECORD_NAMES
+
+from testutils import compSeries, compDataFrame, Mismatches, assertSummaryEqual
 
 import pandas as pd
 import numpy as np
-import math
-
-def compFloat(exp, act, atol = 0.00001):
-    """
-    Compares two floating point values, and returns True if they are equal, False otherwise. Unlike a standard
-    numeric comparison math.nan == math.nan = True and math.inf == math.inf = True (these would normally return
-    False)
-    :param exp: The expected value
-    :type exp: float
-    :param act: the actual value being tested
-    :type act: float
-    :param atol: Absolute tolerance used in Numpy.isclose(...) to compare finite floats
-    :type atol:
-    :return:
-    :rtype:
-    """
-
-    if not isinstance(exp, float) and not isinstance(act, float):
-        # one or the other is not a float, cannot proceed
-        return None
-
-    if math.isnan(exp) and math.isnan(act):
-        return True
-    elif math.isinf(exp) and math.isinf(act):
-        return True
-    else:
-        return np.isclose(exp, act, atol)
-
-
-def compSeries(exp: pd.Series, act: pd.Series, atol=0.000001):
-    """
-    Performs a comparison of two Series objects that accounts for nan, inf, and floating point inaccuracies
-    :param exp: Object representing expected results
-    :type exp: Pandas.Series
-    :param act: Object representing actual results
-    :type act: Pandas.Series
-    :param atol: Absolute tolerance to use with np.isclose function for doing the comparison
-    :param atol: float
-    :return: True if the Series are equal, False otherwise; None if either of exp or act is not Series object
-    :rtype: bool or None
-    """
-
-    if isinstance(act, pd.Series) == False or isinstance(exp, pd.Series) == False:
-        # one of the arguments is not a series, so this is not a valid call
-        return None
-
-    if len(exp) != len(act):
-        return False
-
-    if exp.name != act.name:
-        return False
-
-    if not exp.index.equals(act.index):
-        return False
-
-    if exp.dtype == 'float':
-        # the series is a float, so we'll need to do special handling
-        # first, create a Series of the index so that we can "apply" over the two Series objects
-        idx = pd.Series(exp.index)
-
-        # compare, pairwise, all elements in the two Series
-        result = idx.apply(lambda i: compFloat(exp.loc[i], act.loc[i]))
-
-        # return the aggregate result True if all are equal, False otherwise
-        return np.all(result)
-    else:
-        # we should be able to simply compare them with standard operators
-        return (exp.equals(act))
-
-
-def compDataFrame(exp, act, atol=0.000001):
-    """
-     Performs a comparison of two DataFrame objects that accounts for nan, inf, and floating point inaccuracies
-     :param exp: Object representing expected results
-     :type exp: Pandas.DataFrame
-     :param act: Object representing actual results
-     :type act: Pandas.DataFrame
-     :param atol: Absolute tolerance to use with np.isclose function for doing the comparison
-     :param atol: float
-     :return: True if the Series are equal, False otherwise; None if either of exp or act is not Series object
-     :rtype: bool or None
-     """
-
-    if isinstance(act, pd.DataFrame) == False or isinstance(exp, pd.DataFrame) == False:
-        # one of the arguments is not a series, so this is not a valid call
-        return None
-
-    if exp.shape != act.shape:
-        # exp and act must have the same shape
-        return False
-
-    if any(exp.keys() != act.keys()):
-        # DataFrames must have the same column names
-        return False
-
-    if any(exp.index != act.index):
-        # DataFrames must have the same indexes
-        return False
-
-    # DataFrames have same shape, indexes, and column names, so we can compare the columns one at a time
-    for col in exp.keys():
-        if not compSeries(exp[col], act[col]):
-            # columns are not equal
-            return False
-
-    return True
 
 
 class Test_bbanalyze(TestCase):
@@ -147,13 +48,14 @@ class Test_bbanalyze(TestCase):
                 if k in {'al', 'nl'}:
                     # evaluate the AL or NL dictionaries
                     with self.subTest(League=k):
-                        self.assertTrue(compDataFrame(v['dat'], act[k]['dat']))
+                        self.assertTrue(compDataFrame(v['dat'], act[k]['dat']),
+                                        Mismatches(v['dat'], act[k]['dat']))
                         self.assertEqual(v['players'], act[k]['players'])
                         self.assertEqual(v['teams'], act[k]['teams'])
                 elif isinstance(v, pd.DataFrame):# or isinstance(v, pd.Series):
-                    self.assertTrue(compDataFrame(v, act[k]))
+                    self.assertTrue(compDataFrame(v, act[k]), Mismatches(v, act[k]))
                 elif isinstance(v, pd.Series):
-                    self.assertTrue(compSeries(v, act[k]))
+                    self.assertTrue(compSeries(v, act[k]), Mismatches(v, act[k]))
                 else:
                     # if k == 'records':
                     #     for key in v.keys():
@@ -171,7 +73,7 @@ class Test_bbanalyze(TestCase):
 
         for col in bbexp.columns:
             with self.subTest(column=col):
-                self.assertTrue(compSeries(bbexp[col], bbact[col]))
+                self.assertTrue(compSeries(bbexp[col], bbact[col]), Mismatches(bbexp[col], bbact[col]))
 
     def test_nl(self):
         # verify the NL subset
@@ -245,6 +147,207 @@ class Test_bbanalyze(TestCase):
 
 
 
+class Test_loadBaseball(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = os.path.join(self.tmp, 'cache')
+        self.filename = os.path.join(self.tmp, 'bb.csv')
+        shutil.copy('bb2005.csv', self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_cached_read(self):
+        # cold and warm reads should both match a plain read_csv
+        exp = pd.read_csv(self.filename)
+
+        self.assertTrue(exp.equals(loadBaseball(self.filename, self.cache)))
+        self.assertTrue(os.listdir(self.cache))
+        self.assertTrue(exp.equals(loadBaseball(self.filename, self.cache)))
+
+    def test_snapshot_views(self):
+        # warm reads map the numeric columns of the snapshot, and writing to the frame leaves it unchanged
+        exp = pd.read_csv(self.filename)
+        loadBaseball(self.filename, self.cache)
+
+        act = loadBaseball(self.filename, self.cache)
+        self.assertIsInstance(act['ab'].to_numpy().base, np.memmap)
+        act.loc[0, 'ab'] = -1
+        self.assertTrue(exp.equals(loadBaseball(self.filename, self.cache)))
+
+        for _ in range(2):
+            compact = loadBaseball(self.filename, self.cache, compact=True)
+            self.assertTrue(loadBaseball(self.filename, compact=True).equals(compact))
+
+    def test_invalidation(self):
+        # editing the source file should rebuild the snapshot
+        loadBaseball(self.filename, self.cache)
+
+        edited = pd.read_csv(self.filename).iloc[:10]
+        edited.to_csv(self.filename, index=False)
+
+        self.assertTrue(edited.reset_index(drop=True).equals(loadBaseball(self.filename, self.cache)))
+
+
+    def test_compact_schema(self):
+        # the compact loader should use BASEBALL_SCHEMA and hold the same values
+        exp = pd.read_csv(self.filename)
+        act = loadBaseball(self.filename, compact=True)
+
+        for col in act.columns:
+            with self.subTest(column=col):
+                if col in BASEBALL_SCHEMA:
+                    self.assertEqual(BASEBALL_SCHEMA[col], str(act[col].dtype))
+                self.assertTrue(exp[col].equals(act[col].astype(exp[col].dtype)))
+
+        self.assertLess(act.memory_usage(deep=True).sum(), exp.memory_usage(deep=True).sum())
+
+    def test_compact_results(self):
+        # bbanalyze should find the same counts and records with either schema
+        exp = bbanalyze(self.filename)
+        act = bbanalyze(self.filename, compact=True)
+
+        for k in ['record.count', 'complete.cases', 'years', 'player.count', 'team.count', 'league.count']:
+            with self.subTest(Item=k):
+                self.assertEqual(exp[k], act[k])
+        for league in ['nl', 'al']:
+            with self.subTest(League=league):
+                self.assertEqual(exp[league]['players'], act[league]['players'])
+                self.assertEqual(exp[league]['teams'], act[league]['teams'])
+        self.assertEqual(exp['records'], act['records'])
+
+
+class Test_BattingAggregate(TestCase):
+
+    def setUp(self):
+        self.exp = bbanalyze('baseball.csv')
+
+    def test_chunked(self):
+        for chunksize in [997, 5000, 10 ** 6]:
+            with self.subTest(chunksize=chunksize):
+                act = bbanalyze('baseball.csv', chunksize=chunksize)
+                assertSummaryEqual(self, self.exp, act)
+                self.assertIsNone(act['bb'])
+
+    def test_merge(self):
+        # merging aggregates of two halves of the file should match a single aggregate
+        bb = pd.read_csv('baseball.csv')
+        first, second = BattingAggregate(), BattingAggregate()
+        first.update(bb.iloc[:10000])
+        second.update(bb.iloc[10000:])
+
+        assertSummaryEqual(self, self.exp, first.merge(second).results())
+
+    def test_incremental(self):
+        # feeding a growing file day by day through a saved state should match a full recompute
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        filename = os.path.join(tmp, 'bb.csv')
+        state = os.path.join(tmp, 'state.npz')
+
+        with open('baseball.csv', 'rb') as f:
+            lines = f.readlines()
+
+        # the last append ends part-way through a line, which must wait for the next update
+        appends = [b''.join(lines[:5000]), b''.join(lines[5000:12000]) + lines[12000][:10],
+                   lines[12000][10:] + b''.join(lines[12001:])]
+        BattingAggregate().save(state)
+        rows = 0
+        for data in appends:
+            with open(filename, 'ab') as f:
+                f.write(data)
+            aggregate = BattingAggregate.load(state)
+            rows += aggregate.updateFromFile(filename)
+            aggregate.save(state)
+
+        self.assertEqual(len(lines) - 1, rows)
+        self.assertEqual(0, BattingAggregate.load(state).updateFromFile(filename))
+        assertSummaryEqual(self, self.exp, BattingAggregate.load(state).results())
+
+    def test_from_file_then_update(self):
+        # fromFile records how far it read, so a later update only folds in the appended rows
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        filename = os.path.join(tmp, 'bb.csv')
+        state = os.path.join(tmp, 'state.npz')
+
+        with open('baseball.csv', 'rb') as f:
+            lines = f.readlines()
+        with open(filename, 'wb') as f:
+            f.write(b''.join(lines[:8000]))
+
+        aggregate = BattingAggregate.fromFile(filename, chunksize=997)
+        self.assertEqual(0, aggregate.updateFromFile(filename))
+        self.assertEqual(8000 - 1, aggregate.record_count)
+        aggregate.save(state)
+
+        with open(filename, 'ab') as f:
+            f.write(b''.join(lines[8000:]))
+        aggregate = BattingAggregate.load(state)
+        self.assertEqual(len(lines) - 8000, aggregate.updateFromFile(filename))
+        assertSummaryEqual(self, self.exp, aggregate.results())
+
+    def test_save_failure(self):
+        # a save that fails part-way leaves the previously saved state in place
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        state = os.path.join(tmp, 'state.npz')
+        BattingAggregate.fromFile('baseball.csv').save(state)
+
+        with mock.patch('numpy.savez', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                BattingAggregate().save(state)
+
+        assertSummaryEqual(self, self.exp, BattingAggregate.load(state).results())
+
+
+class Test_BattingAnalysis(TestCase):
+
+    def test_lazy_access(self):
+        # reading a scalar should not build the complete cases or any other entry
+        act = bbanalyze('bb2005.csv', lazy=True)
+
+        self.assertIsInstance(act, BattingAnalysis)
+        self.assertEqual(len(pd.read_csv('bb2005.csv')), act['record.count'])
+        self.assertIsNone(act._complete)
+        self.assertEqual(['record.count'], list(act._values))
+
+    def test_matches_eager(self):
+        # every entry of the lazy result should match the eager dictionary
+        exp = bbanalyze('bb2005.csv')
+        act = bbanalyze('bb2005.csv', lazy=True)
+
+        self.assertEqual(list(exp.keys()), list(act.keys()))
+        self.assertEqual(exp['records'], act['records'])
+        self.assertEqual(exp['nl']['players'], act['nl']['players'])
+        self.assertEqual(exp['al']['teams'], act['al']['teams'])
+        self.assertTrue(exp['bb'].equals(act['bb']))
+        self.assertTrue(exp['al']['dat'].equals(act['al']['dat']))
+        self.assertIs(act['bb'], act['bb'])
+
+
+class Test_computeRecords(TestCase):
+
+    def setUp(self):
+        # career totals built the same way bbanalyze builds them
+        bb2 = pd.read_csv('baseball.csv').dropna()
+        self.totals = bb2[['id'] + STAT_COLUMNS].groupby('id').sum()
+
+    def test_matches_idxmax(self):
+        # every record should match a separate idxmax/max over the eligible players
+        records = computeRecords(self.totals)
+        eligible = self.totals[self.totals['ab'] > 50]
+        stats = recordStats(eligible)
+
+        self.assertEqual(RECORD_NAMES, list(records.keys()))
+        for name in RECORD_NAMES:
+            with self.subTest(Record=name):
+                stat = pd.Series(stats[name], index=eligible.index)
+                self.assertEqual(stat.idxmax(), records[name]['id'])
+                self.assertEqual(stat.max(), records[name]['value'])
+
+
 if __name__ == '__main__':
     rslt = main(verbosity=2, exit=False)
 
@@ -0,0 +1,53 @@
+from unittest import TestCase
+from unittest import main
+
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from bbanalyze import bbanalyze
+from bbbatch import bbbatch
+from testutils import assertSummaryEqual
+
+
+class Test_bbbatch(TestCase):
+
+    def setUp(self):
+        # split baseball.csv into one file per era
+        self.tmp = tempfile.mkdtemp()
+        bb = pd.read_csv('baseball.csv')
+        self.files = []
+        for start in range(1870, 2010, 20):
+            filename = os.path.join(self.tmp, f"bb{start}.csv")
+            bb[(bb['year'] >= start) & (bb['year'] < start + 20)].to_csv(filename, index=False)
+            self.files.append(filename)
+
+        self.act = bbbatch(os.path.join(self.tmp, "bb*.csv"), workers=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_files(self):
+        # the glob should match every file, in sorted order
+        self.assertEqual(self.files, self.act['files'])
+
+    def test_merged(self):
+        # the merged result should match analyzing the whole file at once
+        assertSummaryEqual(self, bbanalyze('baseball.csv'), self.act['merged'])
+
+    def test_per_file(self):
+        # each file's result should match analyzing that file on its own
+        for filename in self.files[-2:]:
+            with self.subTest(File=filename):
+                assertSummaryEqual(self, bbanalyze(filename), self.act['results'][filename])
+
+    def test_serial(self):
+        # a single worker should give the same merged result as the pool
+        serial = bbbatch(self.files, workers=1)
+        assertSummaryEqual(self, self.act['merged'], serial['merged'])
+
+
+if __name__ == '__main__':
+    rslt = main(verbosity=2, exit=False)
@@ -0,0 +1,67 @@
+from unittest import TestCase
+from unittest import main
+
+import pandas as pd
+import numpy as np
+
+from bbanalyze import bbanalyze, careerTotals, recordStats, RECORD_NAMES
+from bbleaderboard import Leaderboard
+
+
+class Test_Leaderboard(TestCase):
+
+    def setUp(self):
+        self.res = bbanalyze('baseball.csv')
+        self.leaderboard = Leaderboard(self.res['bb'])
+
+    def bruteForce(self, bb2, stat, k):
+        # full sort of every eligible player, ties ordered by id
+        totals = careerTotals(bb2)
+        totals = totals[totals['ab'] > 50]
+        values = pd.Series(recordStats(totals)[stat], index=totals.index).astype(float)
+        ranked = values.reset_index().sort_values([0, 'id'], ascending=[False, True]).head(k)
+        return list(ranked['id']), list(ranked[0])
+
+    def test_records(self):
+        # the top of each leaderboard should be bbanalyze's record holder
+        for stat in RECORD_NAMES:
+            with self.subTest(Record=stat):
+                top = self.leaderboard.top(stat, 1)
+                self.assertEqual(self.res['records'][stat]['id'], top.loc[1, 'id'])
+                self.assertAlmostEqual(self.res['records'][stat]['value'], top.loc[1, 'value'])
+
+    def test_filters(self):
+        # filtered leaderboards should match a full sort of the matching rows
+        bb2 = self.res['bb']
+        queries = [('hr', None, None), ('so', 'AL', None), ('obp', 'NL', (1990, 1999)),
+                   ('sb', None, (1980, 1985)), ('g', 'AL', (1901, 1901))]
+        for stat, league, years in queries:
+            with self.subTest(Stat=stat, League=league, Years=years):
+                rows = bb2
+                if league is not None:
+                    rows = rows[rows['lg'] == league]
+                if years is not None:
+                    rows = rows[(rows['year'] >= years[0]) & (rows['year'] <= years[1])]
+                ids, values = self.bruteForce(rows, stat, 25)
+
+                act = self.leaderboard.top(stat, 25, league=league, years=years)
+                self.assertEqual(ids, list(act['id']))
+                self.assertTrue(np.allclose(values, act['value']))
+                self.assertTrue(act.index.equals(pd.RangeIndex(1, len(ids) + 1)))
+
+    def test_ties(self):
+        # players tied at the K-th place are ordered by id, whatever the row order
+        bb2 = pd.DataFrame({'id': ['d', 'c', 'b', 'a', 'e'], 'lg': 'NL', 'year': 2000, 'hr': [5, 7, 5, 5, 9],
+                            'ab': 100, 'h': 0, 'sb': 0, 'so': 0, 'bb': 0, 'g': 0, 'ibb': 0, 'hbp': 0, 'sf': 0, 'sh': 0})
+        for rows in [bb2, bb2.iloc[::-1]]:
+            leaderboard = Leaderboard(rows)
+            self.assertEqual(['e', 'c', 'a', 'b'], list(leaderboard.top('hr', 4)['id']))
+            self.assertEqual(['e', 'c', 'a'], list(leaderboard.top('hr', 3, years=(2000, 2000))['id']))
+
+    def test_unknown_stat(self):
+        with self.assertRaises(KeyError):
+            self.leaderboard.top('era')
+
+
+if __name__ == '__main__':
+    rslt = main(verbosity=2, exit=False)
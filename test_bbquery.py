@@ -0,0 +1,71 @@
+from unittest import TestCase
+from unittest import main
+
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from bbanalyze import bbanalyze
+from bbquery import BattingIndex
+
+
+class Test_BattingIndex(TestCase):
+
+    def setUp(self):
+        self.bb = pd.read_csv('baseball.csv')
+        self.index = BattingIndex(self.bb)
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def mask(self, years=None, team=None, lg=None):
+        # the boolean-mask scan the index replaces
+        bb = self.bb
+        mask = pd.Series(True, index=bb.index)
+        if years is not None:
+            mask &= (bb['year'] >= years[0]) & (bb['year'] <= years[1])
+        if team is not None:
+            mask &= bb['team'] == team
+        if lg is not None:
+            mask &= bb['lg'] == lg
+        return bb[mask]
+
+    def test_frame(self):
+        # the selected rows should be exactly the masked rows, in file order
+        for query in [{}, {'years': (1990, 1999)}, {'team': 'NYA'}, {'team': 'BOS', 'lg': 'NL'},
+                      {'team': 'XXX'}, {'years': (2010, 2020)}]:
+            with self.subTest(**query):
+                self.assertTrue(self.mask(**query).equals(self.index.frame(**query)))
+
+    def test_summary(self):
+        # filtered summaries should match bbanalyze on a pre-filtered CSV
+        for query in [{}, {'years': (1990, 1999)}, {'team': 'NYA'}, {'lg': 'AL', 'years': (1950, 1960)},
+                      {'team': 'BOS', 'lg': 'AL', 'years': (2000, 2007)}]:
+            filename = os.path.join(self.tmp, 'filtered.csv')
+            self.mask(**query).to_csv(filename, index=False)
+            exp = bbanalyze(filename)
+            act = self.index.summary(**query)
+
+            for k in ['record.count', 'complete.cases', 'years', 'player.count', 'team.count', 'league.count',
+                      'records']:
+                with self.subTest(Item=k, **query):
+                    self.assertEqual(exp[k], act[k])
+            for league in ['nl', 'al']:
+                with self.subTest(League=league, **query):
+                    self.assertEqual(exp[league]['players'], act[league]['players'])
+                    self.assertEqual(exp[league]['teams'], act[league]['teams'])
+
+    def test_empty(self):
+        # a filter matching no rows gives zero counts and empty records
+        act = self.index.summary(team='NYA', lg='NL')
+
+        self.assertEqual(0, act['record.count'])
+        self.assertEqual((None, None), act['years'])
+        self.assertIsNone(act['records']['hr']['id'])
+
+
+if __name__ == '__main__':
+    rslt = main(verbosity=2, exit=False)
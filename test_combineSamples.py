@@ -4,8 +4,38 @@ from unittest import main
 import shelve
 import glob
 import os
+import pickle
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-from combineSamples import combineSamples
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+import combineSamples as module
+
+from combineSamples import combineSamples, combineSamplesStream
+from testutils import almostEqualMatches, Mismatches
+
+
+def storeTotals(store):
+    # runs in a worker process, which reopens the store's file
+    return np.asarray(store.test).sum(axis=0)
+
+
+def tampered():
+    # called if a pickled cache entry is ever loaded
+    TAMPERED.append(True)
+
+
+TAMPERED = []
+
+
+class Tampered:
+    def __reduce__(self):
+        return (tampered, ())
 
 
 class Test_combineSamples(TestCase):
@@ -97,23 +127,234 @@ class Test_combineSamples(TestCase):
         #     with self.subTest(Sample=k):
         #         self.assertTrue(self.exp_default[k].equals(actual[k]))
 
-        # verify sample fields one at a time, limiting precision to 5 decimal places
+        # verify all sample fields of each dataframe at once, aligned on the expected labels, limiting precision
+        # to 5 decimal places as assertAlmostEqual did one cell at a time
 
         for k in ['samples', 'control', 'test']:
-            exp = self.exp_default[k]
-            nrow, ncol = exp.shape
-            idx = exp.index
-            colnames = exp
+            exp = self.exp_default[k].astype(float)
+            act = actual[k].reindex(index=exp.index, columns=exp.columns).astype(float)
+
+            with self.subTest(dataframe=k):
+                self.assertTrue(almostEqualMatches(exp.to_numpy(), act.to_numpy(), places=5).all(),
+                                Mismatches(exp, act, places=5))
+
 
-            for i in exp.index:
-                for j in exp.keys():
-                    with self.subTest(dataframe=k, sample=exp.loc[i, 'sample'], column=j):
-                        #if (exp.loc[i, j] != actual[k].loc[i,j]):
-                            #print("Expected Index:", exp.loc[i, j])
-                            #print("Actual Index:", actual[k].loc[i,j])
+    def test_workers(self):
+        # reading the files concurrently gives the same filenames and rows, in the same order
+        serial = combineSamples(self.pattern, control_samples=10)
+        actual = combineSamples(self.pattern, control_samples=10, workers=4)
 
-                        self.assertAlmostEqual(exp.loc[i, j], actual[k].loc[i,j], places=5)
+        self.assertEqual(serial['filenames'], actual['filenames'])
+        for k in ['samples', 'control', 'test']:
+            with self.subTest(dataframe=k):
+                self.assertTrue(serial[k].equals(actual[k]))
+
+    def test_other_directory(self):
+        # files are read from the given path, not from the working directory
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        for filename in self.files[:3]:
+            shutil.copy(filename, path)
+
+        actual = combineSamples(self.pattern, path, workers=2)
+
+        self.assertEqual(len(self.files[:3]), actual['files'])
+        self.assertEqual(sum(len(combineSamples(f)['samples']) for f in self.files[:3]), len(actual['samples']))
+
+    def test_fast(self):
+        # the fixed-format loader builds the same frames, and falls back for files it cannot parse
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        for filename in self.files:
+            shutil.copy(filename, path)
+
+        for name, text in [('fixed', None), ('decimal', '"26",1.5,2,3,4,5,6,7,8\n'), ('missing', '"26",,2,3,4,5,6,7,8\n')]:
+            with self.subTest(files=name):
+                if text is not None:
+                    with open(os.path.join(path, "boiler_sample_26.csv"), 'w') as f:
+                        f.write('"","t1","t2","t3","t4","t5","t6","t7","t8"\n' + text)
+
+                serial = combineSamples(self.pattern, path)
+                actual = combineSamples(self.pattern, path, fast=True, workers=2)
+
+                self.assertEqual(serial['filenames'], actual['filenames'])
+                for k in ['samples', 'control', 'test']:
+                    self.assertTrue(serial[k].equals(actual[k]))
+                    self.assertTrue(serial[k].dtypes.equals(actual[k].dtypes))
+
+    def test_fast_row_widths(self):
+        # rows with too many and too few fields are not shifted into each other's columns
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        header = '"","t1","t2","t3","t4","t5","t6","t7","t8"\n'
+        wide, narrow = '1,1,2,3,4,5,6,7,8,9\n', '2,1,2,3,4,5,6,7\n'
+
+        for name, files in [('files', [wide, narrow]), ('lines', [wide + narrow])]:
+            with self.subTest(rows=name):
+                for old in glob.glob(os.path.join(path, "*.csv")):
+                    os.remove(old)
+                for i, text in enumerate(files):
+                    with open(os.path.join(path, f"boiler_sample_{i}.csv"), 'w') as f:
+                        f.write(header + text)
+
+                bodies = [module._readBody(f) for f in sorted(glob.glob(os.path.join(path, "*.csv")))]
+                self.assertIsNone(module._loadFixed(bodies))
+                with self.assertRaises(ValueError):
+                    combineSamples(self.pattern, path)
+                with self.assertRaises(ValueError):
+                    combineSamples(self.pattern, path, fast=True)
+
+    def test_store(self):
+        # control and test are zero-copy views of the memory-mapped matrix, shared with worker processes
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        actual = combineSamples(self.pattern, control_samples=10, store=os.path.join(path, "samples.npy"))
+        store = actual['store']
+
+        for k in ['control', 'test']:
+            with self.subTest(view=k):
+                view = getattr(store, k)
+                self.assertIsInstance(view, np.memmap)
+                self.assertTrue(np.shares_memory(view, store.values))
+                np.testing.assert_array_equal(actual[k][module.COLUMNS].to_numpy(), view)
+        self.assertTrue(actual['samples'].equals(store.frame()))
+        self.assertTrue(actual['control'].equals(store.frame(slice(0, 10))))
+
+        # only the filename is pickled
+        self.assertLess(len(pickle.dumps(store)), 500)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            totals = pool.submit(storeTotals, store).result()
+        np.testing.assert_array_equal(actual['test'][module.COLUMNS].sum().to_numpy(), totals)
+
+    def test_stream(self):
+        # the streamed batches add up to the control and test frames, control rows first
+        for control_count in [None, 10, 15]:
+            exp = combineSamples(self.pattern, control_samples=control_count)
+            batches = list(combineSamplesStream(self.pattern, control_samples=control_count, batch_files=4))
+
+            kinds = [kind for kind, _ in batches]
+            self.assertEqual(sorted(kinds), kinds)
+            self.assertTrue(all(len(batch) <= 4 for _, batch in batches))
+            for k in ['control', 'test']:
+                with self.subTest(control_samples=control_count, dataframe=k):
+                    self.assertTrue(exp[k].equals(pd.concat([batch for kind, batch in batches if kind == k])))
+
+
+class Test_combineSamplesCache(TestCase):
 
+    def setUp(self):
+        # an empty directory for one-row sample files in the boiler format, and an empty cache
+        self.pattern = "boiler_sample_*.csv"
+        self.path = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def write(self, i, values="507,516,527,516,499,512,472,477"):
+        with open(os.path.join(self.path, f"boiler_sample_{i:05d}.csv"), 'w') as f:
+            f.write(f'"","t1","t2","t3","t4","t5","t6","t7","t8"\n"{i}",{values}\n')
+
+    def run_cached(self):
+        # returns the result, the time taken and the number of files that were read
+        with mock.patch.object(module, '_readBody', wraps=module._readBody) as read:
+            start = time.perf_counter()
+            result = combineSamples(self.pattern, self.path, fast=True, cache_dir=self.cache_dir)
+            return result, time.perf_counter() - start, read.call_count
+
+    def assertSameResult(self, act):
+        exp = combineSamples(self.pattern, self.path, fast=True)
+        self.assertEqual(exp['filenames'], act['filenames'])
+        for k in ['samples', 'control', 'test']:
+            with self.subTest(dataframe=k):
+                self.assertTrue(exp[k].equals(act[k]))
+                self.assertTrue(exp[k].index.equals(act[k].index))
+
+    def test_cold_warm(self):
+        for i in range(1, 50001):
+            self.write(i)
+
+        cold, cold_time, cold_reads = self.run_cached()
+        warm, warm_time, warm_reads = self.run_cached()
+
+        self.assertEqual(50000, cold_reads)
+        self.assertEqual(0, warm_reads)
+        self.assertLess(warm_time, cold_time)
+        self.assertSameResult(warm)
+
+    def test_new_and_changed_files(self):
+        for i in range(1, 101):
+            self.write(i)
+        self.run_cached()
+
+        # new files are read and appended
+        self.write(101)
+        self.write(102)
+        act, _, reads = self.run_cached()
+        self.assertEqual(2, reads)
+        self.assertSameResult(act)
+
+        # only a changed file is read again
+        self.write(7, "1,2,3,4,5,6,7,8000")
+        act, _, reads = self.run_cached()
+        self.assertEqual(1, reads)
+        self.assertSameResult(act)
+
+        # the rows of a removed file are dropped without reading anything
+        os.remove(os.path.join(self.path, "boiler_sample_00050.csv"))
+        act, _, reads = self.run_cached()
+        self.assertEqual(0, reads)
+        self.assertSameResult(act)
+
+    def test_changed_dtypes(self):
+        # a file with decimals makes every measurement a float; once it is gone, every file is read again
+        for i in range(1, 21):
+            self.write(i)
+        self.write(10, "1.5,2,3,4,5,6,7,8")
+        act, _, reads = self.run_cached()
+        self.assertEqual('float64', act['samples']['t1'].dtype)
+
+        self.write(10)
+        act, _, reads = self.run_cached()
+        self.assertEqual(1 + 20, reads)  # the changed file, then every file
+        self.assertEqual('int64', act['samples']['t1'].dtype)
+        self.assertSameResult(act)
+
+    def test_object_columns(self):
+        # rows with text measurements are not cached, and a cache holding pickled objects is never unpickled
+        for i in range(1, 21):
+            self.write(i)
+        self.run_cached()
+        cache_file = glob.glob(os.path.join(self.cache_dir, "*", "samples.npz"))[0]
+        with np.load(cache_file) as data:
+            columns = {col: data[col] for col in data.files}
+        columns["t1"] = np.array([Tampered()] * len(columns["t1"]), dtype=object)
+        np.savez(cache_file, **columns)
+
+        act, _, reads = self.run_cached()
+        self.assertEqual([], TAMPERED)
+        self.assertEqual(20, reads)
+        self.assertSameResult(act)
+
+        # the changed file is read, and the rows are not cached, so the next run reads every file
+        self.write(5, "a,2,3,4,5,6,7,8")
+        for expected in [1, 20]:
+            act, _, reads = self.run_cached()
+            self.assertEqual(expected, reads)
+            self.assertEqual(object, act['samples']['t1'].dtype)
+        self.assertEqual([], os.listdir(os.path.dirname(cache_file)))
+        self.assertSameResult(act)
+
+    def test_other_pattern(self):
+        # each path and pattern has its own cache in cache_dir
+        for i in range(1, 21):
+            self.write(i)
+        self.run_cached()
+
+        combineSamples("boiler_sample_0000*.csv", self.path, fast=True, cache_dir=self.cache_dir)
+        act, _, reads = self.run_cached()
+        self.assertEqual(0, reads)
+        self.assertSameResult(act)
 
 
 if __name__ == '__main__':
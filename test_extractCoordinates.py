@@ -50,6 +50,32 @@ class Test_extractCoordinates(TestCase):
                 with self.subTest(station=self.exp.loc[i, 'station'], col=j):
                     self.assertAlmostEqual(self.exp.loc[i, j], self.act.loc[i,j], places=5)
 
+    def test_fast_parser(self):
+        # the vectorized parser gives the regex results, with NaN for the same rows
+        coordinates = ["(-21.2, -113.8)", "(+0.123456789012345678,7.5)", "(1, 2)", "(1.5,  2.5)", "at 3.25, 4.5",
+                       "(1.2.3, 4.5)", "(-.5, 1.0)", "", None, 12.5, "(3.0,\n4.0)", "(9.75, -0.0)"]
+        dat = pd.DataFrame({'station': range(len(coordinates)), 'coordinates': coordinates},
+                           index=range(100, 100 + len(coordinates)))
+
+        exp = extractCoordinates(dat.copy(), fast=False)
+        act = extractCoordinates(dat.copy())
+
+        self.assertTrue(exp.equals(act))
+        self.assertTrue(exp.dtypes.equals(act.dtypes))
+        self.assertEqual(5, act['lat'].isna().sum())
+        self.assertTrue(self.exp.equals(extractCoordinates(pd.read_csv("coordinates.csv"), fast=False)))
+
+    def test_fast_parser_errors(self):
+        # numbers pd.to_numeric rejects raise the regex path's error from the vectorized parser too
+        for name, value in [('overflow', "(" + "9" * 400 + ".5, 1.0)"), ('non-ASCII digits', "(1.5, ١.٥)")]:
+            with self.subTest(value=name):
+                dat = pd.DataFrame({'station': [1, 2, 3], 'coordinates': ["(1.0, 2.0)", "x", value]})
+                with self.assertRaises(ValueError) as exp:
+                    extractCoordinates(dat.copy(), fast=False)
+                with self.assertRaises(ValueError) as act:
+                    extractCoordinates(dat.copy())
+                self.assertEqual(str(exp.exception), str(act.exception))
+
 
 
 if __name__ == '__main__':
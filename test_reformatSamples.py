@@ -6,8 +6,9 @@ import pandas as pd
 import numpy as np
 import glob
 import os
+import itertools
 
-from reformatSamples import reformatSamples
+from reformatSamples import reformatSamples, reformatRagged, reformatArrays, reformatStream
 
 class Test_reformatSamples(TestCase):
     def setUp(self):
@@ -61,6 +62,101 @@ class Test_reformatSamples(TestCase):
                 with self.subTest(sample=self.exp.iloc[i, 0]):
                     self.assertAlmostEqual(self.exp.iloc[i, j], self.act.iloc[i,j], places=5)
 
+    def test_unsorted_samples(self):
+        # rows in any order give the same result, with each sample's observations kept in input order
+        shuffled = self.dat.sample(frac=1, random_state=0)
+        actual = reformatSamples(shuffled)
+
+        self.assertTrue(self.exp.columns.equals(actual.columns))
+        self.assertEqual(sorted(self.dat['sample'].unique()), actual['sample'].tolist())
+        for sample, row in actual.set_index('sample').iterrows():
+            with self.subTest(sample=sample):
+                self.assertEqual(shuffled.loc[shuffled['sample'] == sample, 'diameter'].tolist(), row.tolist())
+
+        # the trial column added to the input numbers each sample's observations
+        self.assertEqual(list(range(1, 6)) * 40, shuffled.sort_values('sample', kind='stable')['trial'].tolist())
+
+    def test_ragged_samples(self):
+        # drop the last two observations of the last sample and the first of the second
+        ragged = self.dat.drop(index=[self.dat.index[-1], self.dat.index[-2], self.dat.index[5]])
+        counts = [5, 4] + [5] * 37 + [3]
+
+        padded = reformatRagged(ragged, 'padded')
+        csr = reformatRagged(ragged, 'csr')
+        for result in (padded, csr):
+            self.assertEqual(list(range(1, 41)), list(result['sample']))
+            self.assertEqual(counts, list(result['counts']))
+
+        # padded: the full rows match the expected results, the short rows end in NaN
+        actual = padded['reformatted']
+        self.assertTrue(self.exp.columns.equals(actual.columns))
+        self.assertTrue(reformatSamples(ragged, ragged=True).equals(actual))
+        for i in range(2, 39):
+            self.assertTrue(np.allclose(self.exp.iloc[i, 1:].astype(float), actual.iloc[i, 1:]))
+        self.assertTrue(np.isnan(actual.iloc[1, 5]) and np.isnan(actual.iloc[39, 4:]).all())
+
+        # csr: each sample's observations back to back, in input order
+        self.assertEqual([0, 5, 9], list(csr['offsets'][:3]))
+        self.assertEqual(ragged.loc[ragged['sample'] == 2, 'diameter'].tolist(), list(csr['values'][5:9]))
+
+        # a narrower padded layout drops the later observations
+        narrow = reformatRagged(ragged, max_width=3)['reformatted']
+        self.assertEqual(['sample', 'obs.1', 'obs.2', 'obs.3'], list(narrow.columns))
+        self.assertTrue(actual.iloc[:, :4].equals(narrow))
+
+    def test_arrays_leave_input_unchanged(self):
+        for name, dat in [('sorted', self.dat), ('shuffled', self.dat.sample(frac=1, random_state=0))]:
+            with self.subTest(rows=name):
+                original = dat.copy()
+                actual = reformatArrays(dat['sample'], dat['diameter'])
+
+                # the input frame keeps its columns and values, and the result does not share its memory
+                self.assertTrue(original.equals(dat))
+                self.assertEqual(list(original.columns), list(dat.columns))
+                self.assertFalse(np.shares_memory(actual['obs.1'].to_numpy(), dat['diameter'].to_numpy()))
+                self.assertTrue(reformatSamples(dat.copy()).equals(actual))
+
+        self.assertIsNone(reformatArrays(self.dat['sample'][:-1], self.dat['diameter'][:-1]))
+
+    def test_stream(self):
+        # batches of completed samples add up to the reformatted frame, whatever the chunk boundaries
+        sources = {
+            'path': lambda: reformatStream("pistonrings.csv", chunksize=7),
+            'reader': lambda: reformatStream(pd.read_csv("pistonrings.csv", chunksize=5)),
+            'rows': lambda: reformatStream(zip(self.dat['sample'], self.dat['diameter']), chunksize=3),
+        }
+        for name, run in sources.items():
+            with self.subTest(source=name):
+                batches = list(run())
+                self.assertGreater(len(batches), 1)
+                self.assertTrue(self.act.equals(pd.concat(batches)))
+
+    def test_stream_errors(self):
+        # errors are raised when the offending sample closes, after the earlier samples were yielded
+        cases = {
+            'missing observation': (self.dat.drop(index=7), "sample 2 has 4 observations, expected 5"),
+            'out of order': (self.dat.iloc[::-1], "sample 39 is out of order after sample 40"),
+        }
+        for name, (dat, message) in cases.items():
+            with self.subTest(case=name):
+                chunks = (dat.iloc[i:i + 10] for i in range(0, len(dat), 10))
+                stream = reformatStream(chunks)
+                if name == 'missing observation':
+                    self.assertEqual([1], list(next(stream)['sample']))
+                with self.assertRaises(ValueError) as error:
+                    list(stream)
+                self.assertEqual(message, str(error.exception))
+
+    def test_stream_open_sample(self):
+        # a sample that never closes is rejected once it outgrows the first sample, without reading on
+        rows = itertools.chain(zip(self.dat['sample'][:5], self.dat['diameter'][:5]), itertools.repeat((2, 74.0)))
+        stream = reformatStream(rows, chunksize=4)
+
+        self.assertEqual([1], list(next(stream)['sample']))
+        with self.assertRaises(ValueError) as error:
+            next(stream)
+        self.assertEqual("sample 2 has more than 5 observations", str(error.exception))
+
 
 
 if __name__ == '__main__':
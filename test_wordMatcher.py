@@ -0,0 +1,54 @@
+from unittest import TestCase
+from unittest import main
+
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import wordMatcher
+from wordMatcher import PatternMatcher
+
+class Test_PatternMatcher(TestCase):
+    def setUp(self):
+        # setup for all tests
+        self.patterns = ['oo', 'ee', 'tion', 'qu', 'e', 'on', 'ion']
+        self.words = pd.read_csv("words.csv")['x']
+
+    def test_find(self):
+        # overlapping and nested patterns are all reported, like one str.contains per pattern
+        matcher = PatternMatcher(self.patterns)
+        for word in self.words.unique():
+            with self.subTest(word=word):
+                self.assertEqual({j for j, p in enumerate(self.patterns) if p in word}, matcher.find(word))
+
+    def test_matches(self):
+        words = pd.concat([self.words, pd.Series([np.nan, 'question'])], ignore_index=True)
+        codes, found, frequency = PatternMatcher(self.patterns).matches(words)
+
+        for j, pattern in enumerate(self.patterns):
+            with self.subTest(pattern=pattern):
+                exp = words.str.contains(pattern, regex=False, na=False).to_numpy(dtype=bool)
+                np.testing.assert_array_equal(exp, (codes >= 0) & found[codes, j])
+                self.assertEqual(exp.sum(), frequency @ found[:, j])
+
+    def test_search_and_automaton(self):
+        # the per-pattern search used for few patterns finds the same matches as the automaton, including in
+        # words that contain the character used to join them
+        words = pd.concat([self.words, pd.Series(['a\x00oo', '\x00', 'oo\x01o', np.nan])], ignore_index=True)
+        for patterns in (self.patterns, ['\x00', 'oo', 'o\x01']):
+            matcher = PatternMatcher(patterns)
+            with self.subTest(patterns=patterns):
+                with mock.patch.object(wordMatcher, 'AUTOMATON_PATTERNS', 0):
+                    exp = matcher.matches(words)[1]
+                np.testing.assert_array_equal(exp, matcher.matches(words)[1])
+
+    def test_invalid_patterns(self):
+        for patterns in (['oo', 'oo'], ['oo', '']):
+            with self.subTest(patterns=patterns):
+                with self.assertRaises(ValueError):
+                    PatternMatcher(patterns)
+
+
+if __name__ == '__main__':
+    rslt = main(verbosity=2, exit=False)
@@ -0,0 +1,242 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def compFloat(exp, act, atol = 0.00001):
+    """
+    Compares two floating point values, and returns True if they are equal, False otherwise. Unlike a standard
+    numeric comparison math.nan == math.nan = True and math.inf == math.inf = True (these would normally return
+    False)
+    :param exp: The expected value
+    :type exp: float
+    :param act: the actual value being tested
+    :type act: float
+    :param atol: Tolerance passed positionally to Numpy.isclose(...) to compare finite floats
+    :type atol: float
+    :return: True if the values are equal, False otherwise; None if neither value is a float
+    :rtype: bool or None
+    """
+
+    if not isinstance(exp, float) and not isinstance(act, float):
+        # one or the other is not a float, cannot proceed
+        return None
+
+    if math.isnan(exp) and math.isnan(act):
+        return True
+    elif math.isinf(exp) and math.isinf(act):
+        return True
+    else:
+        return np.isclose(exp, act, atol)
+
+
+def floatMatches(exp, act, rtol=0.00001):
+    """
+    Element-wise version of compFloat over whole arrays in a single NumPy pass: nan matches nan, inf matches
+    inf, and finite values are compared with Numpy.isclose(exp, act, rtol). compFloat passes its tolerance to
+    isclose positionally, so it has always been a relative tolerance (with isclose's default atol of 1e-8).
+    :param exp: The expected values
+    :type exp: numpy.ndarray
+    :param act: The actual values, with the same shape as exp
+    :type act: numpy.ndarray
+    :param rtol: Relative tolerance passed to Numpy.isclose
+    :type rtol: float
+    :return: Boolean array that is True where the values match
+    :rtype: numpy.ndarray
+    """
+
+    exp = np.asarray(exp, dtype=float)
+    act = np.asarray(act, dtype=float)
+
+    with np.errstate(invalid='ignore'):
+        return (np.isnan(exp) & np.isnan(act)) | (np.isinf(exp) & np.isinf(act)) | np.isclose(exp, act, rtol=rtol)
+
+
+def almostEqualMatches(exp, act, places=7):
+    """
+    Element-wise version of unittest's assertAlmostEqual(exp, act, places=places): values match when they are
+    equal or when their difference rounded to `places` decimal places is 0. This is an absolute tolerance, and
+    nan does not match nan.
+    :param exp: The expected values
+    :type exp: numpy.ndarray
+    :param act: The actual values, with the same shape as exp
+    :type act: numpy.ndarray
+    :param places: Number of decimal places, as in assertAlmostEqual
+    :type places: int
+    :return: Boolean array that is True where the values match
+    :rtype: numpy.ndarray
+    """
+
+    exp = np.asarray(exp, dtype=float)
+    act = np.asarray(act, dtype=float)
+
+    with np.errstate(invalid='ignore'):
+        matches = exp == act
+        diff = np.abs(exp - act)
+
+    # the few values that are close but not equal are rounded one at a time, exactly as assertAlmostEqual does
+    for i in np.flatnonzero(~matches & (diff <= 10.0 ** -places)):
+        matches.flat[i] = round(float(diff.flat[i]), places) == 0
+    return matches
+
+
+def compSeries(exp: pd.Series, act: pd.Series, atol=0.00001):
+    """
+    Performs a comparison of two Series objects that accounts for nan, inf, and floating point inaccuracies
+    :param exp: Object representing expected results
+    :type exp: Pandas.Series
+    :param act: Object representing actual results
+    :type act: Pandas.Series
+    :param atol: Tolerance passed to floatMatches (a relative tolerance, like compFloat's, which the
+                 element-by-element comparison this replaces always used)
+    :type atol: float
+    :return: True if the Series are equal, False otherwise; None if either of exp or act is not Series object
+    :rtype: bool or None
+    """
+
+    if isinstance(act, pd.Series) == False or isinstance(exp, pd.Series) == False:
+        # one of the arguments is not a series, so this is not a valid call
+        return None
+
+    if len(exp) != len(act):
+        return False
+
+    if exp.name != act.name:
+        return False
+
+    if not exp.index.equals(act.index):
+        return False
+
+    if exp.dtype == 'float':
+        # the series is a float, so compare all elements at once
+        return bool(floatMatches(exp.to_numpy(), act.to_numpy(), atol).all())
+    else:
+        # we should be able to simply compare them with standard operators
+        return (exp.equals(act))
+
+
+def compDataFrame(exp, act, atol=0.00001):
+    """
+     Performs a comparison of two DataFrame objects that accounts for nan, inf, and floating point inaccuracies
+     :param exp: Object representing expected results
+     :type exp: Pandas.DataFrame
+     :param act: Object representing actual results
+     :type act: Pandas.DataFrame
+     :param atol: Tolerance passed to floatMatches (see compSeries)
+     :type atol: float
+     :return: True if the DataFrames are equal, False otherwise; None if either of exp or act is not DataFrame
+     :rtype: bool or None
+     """
+
+    if isinstance(act, pd.DataFrame) == False or isinstance(exp, pd.DataFrame) == False:
+        # one of the arguments is not a data frame, so this is not a valid call
+        return None
+
+    if exp.shape != act.shape:
+        # exp and act must have the same shape
+        return False
+
+    if any(exp.keys() != act.keys()):
+        # DataFrames must have the same column names
+        return False
+
+    if any(exp.index != act.index):
+        # DataFrames must have the same indexes
+        return False
+
+    # DataFrames have same shape, indexes, and column names, so we can compare the columns one at a time
+    for col in exp.keys():
+        if not compSeries(exp[col], act[col], atol):
+            # columns are not equal
+            return False
+
+    return True
+
+
+def firstMismatches(exp, act, atol=0.00001, limit=5, places=None):
+    """
+    Finds the first cells where two DataFrames (or Series) with the same labels differ, using the same rules as
+    compSeries: float columns are compared with floatMatches, other columns with ==.
+    :param exp: Object representing expected results
+    :type exp: Pandas.DataFrame or Pandas.Series
+    :param act: Object representing actual results, with the labels of exp
+    :type act: Pandas.DataFrame or Pandas.Series
+    :param atol: Tolerance passed to floatMatches (see compSeries)
+    :type atol: float
+    :param limit: Maximum number of cells to report
+    :type limit: int
+    :param places: Compare float columns with almostEqualMatches at this many decimal places instead
+    :type places: int or None
+    :return: One line per mismatching cell ("row r, column c: expected != actual"), empty if all cells match;
+             or what differs when act is not the same kind of object with the same labels
+    :rtype: str
+    """
+
+    if type(act) is not type(exp):
+        return f"expected a {type(exp).__name__}, got {type(act).__name__}"
+
+    if isinstance(exp, pd.Series):
+        exp, act = exp.to_frame(), act.to_frame(exp.name)
+
+    for axis, e, a in [('index', exp.index, act.index), ('columns', exp.columns, act.columns)]:
+        if not e.equals(a):
+            return f"{axis} differ: expected {list(e[:limit])}..., got {list(a[:limit])}..."
+
+    lines = []
+    for j, col in enumerate(exp.columns):
+        e, a = exp.iloc[:, j].to_numpy(), act.iloc[:, j].to_numpy()
+        if exp.iloc[:, j].dtype == 'float':
+            matches = floatMatches(e, a, atol) if places is None else almostEqualMatches(e, a, places)
+        else:
+            matches = (e == a) | (pd.isna(e) & pd.isna(a))
+        for i in np.flatnonzero(~matches)[:limit]:
+            lines.append((i, f"row {exp.index[i]}, column {col}: {e[i]} != {a[i]}"))
+
+    return "\n".join(line for _, line in sorted(lines, key=lambda item: item[0])[:limit])
+
+
+class Mismatches:
+    """
+    Assertion message that lists the first mismatching cells (see firstMismatches). unittest only turns a message
+    into text when the assertion fails, so passing comparisons never pay for the listing.
+    """
+
+    def __init__(self, exp, act, **options):
+        self.exp = exp
+        self.act = act
+        self.options = options
+
+    def __str__(self):
+        try:
+            return firstMismatches(self.exp, self.act, **self.options)
+        except Exception as error:
+            # never hide the failing assertion behind an error in its message
+            return f"(could not list the mismatching cells: {error!r})"
+
+
+def assertSummaryEqual(test, exp, act):
+    """
+    Asserts that two bbanalyze results hold the same scalars, league counts and records, each in its own subTest
+    of the calling test case. Record values must also have the same type. The data frames ('bb' and each league's
+    'dat') are not compared, since chunked and merged results do not build them.
+    :param test: The running test case, used for its assertions and subTests
+    :type test: unittest.TestCase
+    :param exp: The expected bbanalyze result
+    :type exp: dict
+    :param act: The actual bbanalyze result being tested
+    :type act: dict
+    """
+
+    for k in ['record.count', 'complete.cases', 'years', 'player.count', 'team.count', 'league.count']:
+        with test.subTest(Item=k):
+            test.assertEqual(exp[k], act[k])
+    for league in ['nl', 'al']:
+        with test.subTest(League=league):
+            test.assertEqual(exp[league]['players'], act[league]['players'])
+            test.assertEqual(exp[league]['teams'], act[league]['teams'])
+    test.assertEqual(set(exp['records']), set(act['records']))
+    for record in exp['records']:
+        with test.subTest(Record=record):
+            test.assertEqual(exp['records'][record], act['records'][record])
+            test.assertEqual(type(exp['records'][record]['value']), type(act['records'][record]['value']))
@@ -0,0 +1,119 @@
+import re
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Below this many patterns, matches() searches the joined distinct words once per pattern instead of running
+# the automaton. A search runs in C and costs about one pass over the text plus one step per match, while the
+# automaton steps through every character in Python: on 180,000 distinct words and 2 to 4 letter patterns the
+# two cost the same at about 500 patterns (see benchPatterns in bench_analyzeWords.py).
+AUTOMATON_PATTERNS = 512
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton that finds which of a set of substrings occur in a word in a single scan.
+
+    The automaton is a trie of the patterns with failure links, so scanning a word costs one step per character
+    plus one per match, however many patterns there are. With fewer than AUTOMATON_PATTERNS patterns, matches()
+    runs one C-speed search per pattern over all the distinct words instead, which is faster.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns (iterable): The substrings to look for. Empty and repeated patterns are not allowed.
+        """
+        self.patterns = tuple(patterns)
+        if len(set(self.patterns)) != len(self.patterns) or '' in self.patterns:
+            raise ValueError(f"patterns must be distinct non-empty strings, got {self.patterns}")
+
+        # trie: one dict of character -> state per state, and the patterns ending at each state
+        self._goto = [{}]
+        self._out = [()]
+        for j, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._out.append(())
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state] += (j,)
+
+        # failure links in breadth-first order; each state also reports the patterns of its failure state
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                if state:
+                    self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def find(self, word):
+        """
+        Returns:
+            set: Positions (in self.patterns) of the patterns that occur in word.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for char in word:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def matchUniques(self, uniques):
+        """
+        Finds every pattern in each of a sequence of distinct words.
+
+        Args:
+            uniques (array-like): The words. Missing and non-string values match nothing.
+
+        Returns:
+            np.ndarray: Boolean matrix with one row per word and one column per pattern.
+        """
+        uniques = list(uniques)
+        found = np.zeros((len(uniques), len(self.patterns)), dtype=bool)
+        rows = [i for i, word in enumerate(uniques) if isinstance(word, str)]
+        words = [uniques[i] for i in rows]
+        if len(self.patterns) >= AUTOMATON_PATTERNS:
+            for i, word in zip(rows, words):
+                found[i, list(self.find(word))] = True
+            return found
+
+        # join the words with a character no pattern contains, so that no match spans two words, and map the
+        # start of each match back to its word
+        separator = next(chr(c) for c in range(0x110000) if not any(chr(c) in p for p in self.patterns))
+        text = separator.join(words)
+        starts = np.cumsum([0] + [len(word) + 1 for word in words[:-1]])
+        rows = np.asarray(rows, dtype=np.int64)
+        for j, pattern in enumerate(self.patterns):
+            positions = np.fromiter((m.start() for m in re.finditer(re.escape(pattern), text)), dtype=np.int64)
+            found[rows[np.searchsorted(starts, positions, side='right') - 1], j] = True
+        return found
+
+    def matches(self, words):
+        """
+        Finds every pattern in every distinct word of a Series. Each distinct word is matched once, however often
+        it occurs.
+
+        Args:
+            words (pd.Series): Words to scan. Missing and non-string values match nothing.
+
+        Returns:
+            tuple: The integer codes of the words (-1 where missing), a boolean matrix with one row per distinct
+                   word and one column per pattern, and the number of times each distinct word occurs.
+        """
+        codes, uniques = pd.factorize(words)
+        found = self.matchUniques(uniques)
+        return codes, found, np.bincount(codes[codes >= 0], minlength=len(uniques))